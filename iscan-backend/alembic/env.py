@@ -7,10 +7,13 @@ import sys
 
 sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
 
+from app.core.config import settings
 from app.core.database import Base
 from app.models import *
 
 config = context.config
+# Migrate the database the app is configured for (DATABASE_URL) rather than alembic.ini's default
+config.set_main_option("sqlalchemy.url", settings.database_url.replace("%", "%%"))
 
 if config.config_file_name is not None:
     fileConfig(config.config_file_name)
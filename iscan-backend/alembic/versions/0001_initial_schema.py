@@ -0,0 +1,86 @@
+"""initial schema
+
+Revision ID: 0001_initial_schema
+Revises: 
+Create Date: 2026-10-17 09:00:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001_initial_schema'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('status', sa.Enum('CREATED', 'PROCESSING', 'COMPLETED', 'FAILED', name='batchstatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_batches_id'), 'batches', ['id'], unique=False)
+    op.create_index(op.f('ix_batches_name'), 'batches', ['name'], unique=False)
+    op.create_table('file_types',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=100), nullable=False),
+    sa.Column('description', sa.Text(), nullable=True),
+    sa.Column('processing_prompts', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_file_types_id'), 'file_types', ['id'], unique=False)
+    op.create_index(op.f('ix_file_types_name'), 'file_types', ['name'], unique=True)
+    op.create_table('files',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('original_name', sa.String(length=255), nullable=False),
+    sa.Column('unique_name', sa.String(length=255), nullable=False),
+    sa.Column('file_type_id', sa.Integer(), nullable=False),
+    sa.Column('ftp_path', sa.String(length=500), nullable=False),
+    sa.Column('status', sa.Enum('UPLOADED', 'QUEUED', 'PROCESSING', 'COMPLETED', 'FAILED', name='filestatus'), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['file_type_id'], ['file_types.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_files_id'), 'files', ['id'], unique=False)
+    op.create_index(op.f('ix_files_unique_name'), 'files', ['unique_name'], unique=True)
+    op.create_table('processing_results',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('file_id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('result_data', sa.JSON(), nullable=False),
+    sa.Column('csv_path', sa.String(length=500), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['batches.id'], ),
+    sa.ForeignKeyConstraint(['file_id'], ['files.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_processing_results_id'), 'processing_results', ['id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_processing_results_id'), table_name='processing_results')
+    op.drop_table('processing_results')
+    op.drop_index(op.f('ix_files_unique_name'), table_name='files')
+    op.drop_index(op.f('ix_files_id'), table_name='files')
+    op.drop_table('files')
+    op.drop_index(op.f('ix_file_types_name'), table_name='file_types')
+    op.drop_index(op.f('ix_file_types_id'), table_name='file_types')
+    op.drop_table('file_types')
+    op.drop_index(op.f('ix_batches_name'), table_name='batches')
+    op.drop_index(op.f('ix_batches_id'), table_name='batches')
+    op.drop_table('batches')
+    sa.Enum(name='filestatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='batchstatus').drop(op.get_bind(), checkfirst=True)
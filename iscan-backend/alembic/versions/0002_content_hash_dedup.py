@@ -0,0 +1,33 @@
+"""content hash deduplication and prompt versions
+
+Revision ID: 0002_content_hash_dedup
+Revises: 0001_initial_schema
+Create Date: 2026-10-17 09:01:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002_content_hash_dedup'
+down_revision: Union[str, None] = '0001_initial_schema'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # Existing file types start at version 1, like new ones
+    op.add_column('file_types', sa.Column('prompt_version', sa.Integer(), server_default='1', nullable=False))
+    op.add_column('files', sa.Column('content_hash', sa.String(length=64), nullable=True))
+    op.create_index(op.f('ix_files_content_hash'), 'files', ['content_hash'], unique=False)
+    op.add_column('processing_results', sa.Column('prompt_version', sa.Integer(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('processing_results', 'prompt_version')
+    op.drop_index(op.f('ix_files_content_hash'), table_name='files')
+    op.drop_column('files', 'content_hash')
+    op.drop_column('file_types', 'prompt_version')
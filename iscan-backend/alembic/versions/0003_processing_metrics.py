@@ -0,0 +1,26 @@
+"""per-result processing metrics
+
+Revision ID: 0003_processing_metrics
+Revises: 0002_content_hash_dedup
+Create Date: 2026-10-17 09:02:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003_processing_metrics'
+down_revision: Union[str, None] = '0002_content_hash_dedup'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('processing_results', sa.Column('processing_metrics', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('processing_results', 'processing_metrics')
@@ -0,0 +1,43 @@
+"""extracted page text cache
+
+Revision ID: 0004_extracted_texts
+Revises: 0003_processing_metrics
+Create Date: 2026-10-17 09:03:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004_extracted_texts'
+down_revision: Union[str, None] = '0003_processing_metrics'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('extracted_texts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('content_hash', sa.String(length=64), nullable=False),
+    sa.Column('extractor_version', sa.Integer(), nullable=False),
+    sa.Column('variant', sa.String(length=255), nullable=False),
+    sa.Column('pages_data', sa.LargeBinary(), nullable=False),
+    sa.Column('page_count', sa.Integer(), nullable=False),
+    sa.Column('text_bytes', sa.Integer(), nullable=False),
+    sa.Column('stored_bytes', sa.Integer(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('last_used_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('content_hash', 'extractor_version', 'variant', name='uq_extracted_text_key')
+    )
+    op.create_index(op.f('ix_extracted_texts_id'), 'extracted_texts', ['id'], unique=False)
+    op.create_index(op.f('ix_extracted_texts_last_used_at'), 'extracted_texts', ['last_used_at'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_extracted_texts_last_used_at'), table_name='extracted_texts')
+    op.drop_index(op.f('ix_extracted_texts_id'), table_name='extracted_texts')
+    op.drop_table('extracted_texts')
@@ -0,0 +1,28 @@
+"""model used and escalation per result
+
+Revision ID: 0005_model_routing
+Revises: 0004_extracted_texts
+Create Date: 2026-10-17 09:04:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005_model_routing'
+down_revision: Union[str, None] = '0004_extracted_texts'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('processing_results', sa.Column('model_used', sa.String(length=100), nullable=True))
+    op.add_column('processing_results', sa.Column('escalated', sa.Boolean(), nullable=True))
+
+
+def downgrade() -> None:
+    op.drop_column('processing_results', 'escalated')
+    op.drop_column('processing_results', 'model_used')
@@ -0,0 +1,30 @@
+"""provider batch API submissions
+
+Revision ID: 0006_provider_batches
+Revises: 0005_model_routing
+Create Date: 2026-10-17 09:05:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006_provider_batches'
+down_revision: Union[str, None] = '0005_model_routing'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('batches', sa.Column('provider_batch_id', sa.String(length=100), nullable=True))
+    op.add_column('batches', sa.Column('provider_batch_status', sa.String(length=50), nullable=True))
+    op.create_index(op.f('ix_batches_provider_batch_id'), 'batches', ['provider_batch_id'], unique=False)
+
+
+def downgrade() -> None:
+    op.drop_index(op.f('ix_batches_provider_batch_id'), table_name='batches')
+    op.drop_column('batches', 'provider_batch_status')
+    op.drop_column('batches', 'provider_batch_id')
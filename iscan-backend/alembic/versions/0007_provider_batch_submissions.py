@@ -0,0 +1,49 @@
+"""one row per provider batch submission
+
+Revision ID: 0007_provider_batch_submissions
+Revises: 0006_provider_batches
+Create Date: 2026-10-17 09:06:00.000000
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007_provider_batch_submissions'
+down_revision: Union[str, None] = '0006_provider_batches'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table('provider_batches',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('batch_id', sa.Integer(), nullable=False),
+    sa.Column('provider_batch_id', sa.String(length=100), nullable=False),
+    sa.Column('status', sa.String(length=50), nullable=False),
+    sa.Column('file_ids', sa.JSON(), nullable=False),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=True),
+    sa.Column('completed_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['batch_id'], ['batches.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_provider_batches_batch_id'), 'provider_batches', ['batch_id'], unique=False)
+    op.create_index(op.f('ix_provider_batches_id'), 'provider_batches', ['id'], unique=False)
+    op.create_index(op.f('ix_provider_batches_provider_batch_id'), 'provider_batches', ['provider_batch_id'], unique=True)
+    # Only the latest submission of a batch was recorded, without its files
+    op.drop_index(op.f('ix_batches_provider_batch_id'), table_name='batches')
+    op.drop_column('batches', 'provider_batch_status')
+    op.drop_column('batches', 'provider_batch_id')
+
+
+def downgrade() -> None:
+    op.add_column('batches', sa.Column('provider_batch_id', sa.String(length=100), nullable=True))
+    op.add_column('batches', sa.Column('provider_batch_status', sa.String(length=50), nullable=True))
+    op.create_index(op.f('ix_batches_provider_batch_id'), 'batches', ['provider_batch_id'], unique=False)
+    op.drop_index(op.f('ix_provider_batches_provider_batch_id'), table_name='provider_batches')
+    op.drop_index(op.f('ix_provider_batches_id'), table_name='provider_batches')
+    op.drop_index(op.f('ix_provider_batches_batch_id'), table_name='provider_batches')
+    op.drop_table('provider_batches')
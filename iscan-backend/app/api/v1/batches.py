@@ -1,11 +1,19 @@
+import os
+import uuid
 from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File as FastAPIFile
+from sqlalchemy import insert
+from sqlalchemy.orm import Session, selectinload
 from pydantic import BaseModel
 
 from app.core.database import get_db
-from app.models import Batch, ProcessingResult
+from app.langgraph.packing import packing_enabled
+from app.models import Batch, File, FileType, ProcessingResult
 from app.models.batch import BatchStatus
+from app.models.file import FileStatus
+from app.services.dedup_service import HashingReader, dedup_service
+from app.services.storage_service import storage_service
+from app.services.io_executor import io_executor
 from app.services.queue_service import queue_service
 
 router = APIRouter()
@@ -16,20 +24,33 @@ class BatchResponse(BaseModel):
     status: str
     created_at: str
     completed_at: Optional[str] = None
+    provider_batch_statuses: List[str] = []
 
 class BatchCreate(BaseModel):
     name: str
 
+class BatchFileUploadResult(BaseModel):
+    file_id: int
+    original_name: str
+    task_id: Optional[str] = None
+    deduplicated: bool = False
+
+class BatchFilesUploadResponse(BaseModel):
+    batch_id: int
+    message: str
+    files: List[BatchFileUploadResult]
+
 @router.get("/", response_model=List[BatchResponse])
 def get_batches(db: Session = Depends(get_db)):
-    batches = db.query(Batch).all()
+    batches = db.query(Batch).options(selectinload(Batch.provider_batches)).all()
     return [
         BatchResponse(
             id=b.id,
             name=b.name,
             status=b.status.value,
             created_at=b.created_at.isoformat(),
-            completed_at=b.completed_at.isoformat() if b.completed_at else None
+            completed_at=b.completed_at.isoformat() if b.completed_at else None,
+            provider_batch_statuses=[provider_batch.status for provider_batch in b.provider_batches]
         )
         for b in batches
     ]
@@ -48,6 +69,116 @@ def create_batch(batch: BatchCreate, db: Session = Depends(get_db)):
         created_at=db_batch.created_at.isoformat()
     )
 
+@router.post("/{batch_id}/files", response_model=BatchFilesUploadResponse)
+async def upload_batch_files(
+    batch_id: int,
+    files: List[UploadFile] = FastAPIFile(...),
+    file_type_id: int = 1,
+    force_reprocess: bool = False,
+    offline: bool = False,
+    db: Session = Depends(get_db)
+):
+    """Upload many PDFs into one batch over a shared storage session, insert and enqueue.
+
+    With offline=true the files are submitted to the provider's batch API instead of
+    being processed one request at a time; results arrive within its completion window.
+    """
+    for upload in files:
+        if not upload.filename.lower().endswith('.pdf'):
+            raise HTTPException(status_code=400, detail=f"Only PDF files are allowed: {upload.filename}")
+    
+    batch = db.query(Batch).filter(Batch.id == batch_id).first()
+    if not batch:
+        raise HTTPException(status_code=404, detail="Batch not found")
+    
+    file_type = db.query(FileType).filter(FileType.id == file_type_id).first()
+    if not file_type:
+        raise HTTPException(status_code=404, detail="File type not found")
+    
+    # Only the name part: the client controls it and it becomes part of the storage path
+    unique_names = [f"{uuid.uuid4()}_{os.path.basename(upload.filename)}" for upload in files]
+    readers = [HashingReader(upload.file) for upload in files]
+    
+    # Stream every spooled upload over one storage session off the event loop
+    try:
+        for upload in files:
+            await upload.seek(0)
+        ftp_paths = await io_executor.run(
+            storage_service.upload_pdf_streams,
+            list(zip(readers, unique_names))
+        )
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Storage upload error: {str(e)}")
+    
+    rows = [
+        {
+            "original_name": upload.filename,
+            "unique_name": unique_name,
+            "file_type_id": file_type_id,
+            "ftp_path": ftp_path,
+            "content_hash": reader.hexdigest(),
+            "status": FileStatus.UPLOADED
+        }
+        for upload, unique_name, ftp_path, reader in zip(files, unique_names, ftp_paths, readers)
+    ]
+    file_ids = db.scalars(
+        insert(File).returning(File.id, sort_by_parameter_order=True),
+        rows
+    ).all()
+    db.commit()
+    
+    # Byte-identical uploads already processed with the current prompts reuse their result
+    reused_ids = set()
+    if not force_reprocess:
+        reusable = dedup_service.find_reusable_results(db, [row["content_hash"] for row in rows], file_type)
+        for file_id, row in zip(file_ids, rows):
+            source = reusable.get(row["content_hash"])
+            if source:
+                dedup_service.reuse_result(db, file_id, source, batch_id)
+                reused_ids.add(file_id)
+        if reused_ids:
+            db.query(File).filter(File.id.in_(reused_ids)).update(
+                {File.status: FileStatus.COMPLETED},
+                synchronize_session=False
+            )
+            db.commit()
+    
+    queued_ids = [file_id for file_id in file_ids if file_id not in reused_ids]
+    task_ids = {}
+    if queued_ids and offline:
+        # Overnight batches go through the provider's batch API in one submission
+        task_id = queue_service.enqueue_provider_batch(batch_id, queued_ids, file_type_id)
+        task_ids = {file_id: task_id for file_id in queued_ids}
+    elif queued_ids:
+        # File types with packing enabled send several small documents per LLM request
+        enqueue = (
+            queue_service.enqueue_packed_file_processing
+            if packing_enabled(file_type.processing_prompts)
+            else queue_service.enqueue_many_file_processing
+        )
+        task_ids = dict(zip(queued_ids, enqueue(queued_ids, file_type_id, batch_id, force_reprocess)))
+    
+    if queued_ids:
+        db.query(File).filter(File.id.in_(queued_ids)).update(
+            {File.status: FileStatus.QUEUED},
+            synchronize_session=False
+        )
+        db.commit()
+    
+    return BatchFilesUploadResponse(
+        batch_id=batch_id,
+        message=f"{len(file_ids)} files uploaded successfully, {len(queued_ids)} queued for processing and {len(reused_ids)} deduplicated",
+        files=[
+            BatchFileUploadResult(
+                file_id=file_id,
+                original_name=upload.filename,
+                task_id=task_ids.get(file_id),
+                deduplicated=file_id in reused_ids
+            )
+            for upload, file_id in zip(files, file_ids)
+        ]
+    )
+
 @router.get("/{batch_id}/results")
 def get_batch_results(batch_id: int, db: Session = Depends(get_db)):
     batch = db.query(Batch).filter(Batch.id == batch_id).first()
@@ -5,9 +5,28 @@ from pydantic import BaseModel
 
 from app.core.database import get_db
 from app.models import FileType
+from app.langgraph.chunking import validate_chunking, validate_merge_rules
+from app.langgraph.model_routing import validate_model_routing
+from app.langgraph.packing import validate_packing
+from app.langgraph.structured_output import validate_structured_output
+from app.langgraph.text_compaction import validate_compaction
+from app.langgraph.text_extraction import validate_page_selection
 
 router = APIRouter()
 
+def validate_processing_prompts(processing_prompts: dict):
+    """Reject processing_prompts whose optional processing rules are malformed"""
+    try:
+        validate_page_selection(processing_prompts.get("page_selection"))
+        validate_compaction(processing_prompts.get("compaction"))
+        validate_chunking(processing_prompts.get("chunking"), processing_prompts.get("compaction"))
+        validate_merge_rules(processing_prompts.get("merge_rules"))
+        validate_structured_output(processing_prompts.get("structured_output"))
+        validate_model_routing(processing_prompts.get("model_routing"))
+        validate_packing(processing_prompts.get("packing"))
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=f"Invalid processing_prompts: {e}")
+
 class FileTypeResponse(BaseModel):
     id: int
     name: str
@@ -52,6 +71,8 @@ def create_file_type(file_type: FileTypeCreate, db: Session = Depends(get_db)):
     if existing:
         raise HTTPException(status_code=400, detail="File type with this name already exists")
     
+    validate_processing_prompts(file_type.processing_prompts)
+    
     db_file_type = FileType(
         name=file_type.name,
         description=file_type.description,
@@ -98,8 +119,12 @@ def update_file_type(file_type_id: int, file_type_data: FileTypeUpdate, db: Sess
         if existing:
             raise HTTPException(status_code=400, detail="File type with this name already exists")
     
+    validate_processing_prompts(file_type_data.processing_prompts)
+    
     file_type.name = file_type_data.name
     file_type.description = file_type_data.description
+    if file_type_data.processing_prompts != file_type.processing_prompts:
+        file_type.prompt_version = (file_type.prompt_version or 1) + 1
     file_type.processing_prompts = file_type_data.processing_prompts
     
     db.commit()
@@ -120,6 +145,10 @@ def update_file_type_prompts(file_type_id: int, prompts_data: PromptsUpdate, db:
     if not file_type:
         raise HTTPException(status_code=404, detail="File type not found")
     
+    validate_processing_prompts(prompts_data.processing_prompts)
+    
+    if prompts_data.processing_prompts != file_type.processing_prompts:
+        file_type.prompt_version = (file_type.prompt_version or 1) + 1
     file_type.processing_prompts = prompts_data.processing_prompts
     
     db.commit()
@@ -8,7 +8,9 @@ from pydantic import BaseModel
 from app.core.database import get_db
 from app.models import File, FileType, Batch, ProcessingResult
 from app.models.file import FileStatus
-from app.services.ftp_service import ftp_service
+from app.services.dedup_service import HashingReader, dedup_service
+from app.services.storage_service import storage_service
+from app.services.io_executor import io_executor
 from app.services.queue_service import queue_service
 
 router = APIRouter()
@@ -27,12 +29,14 @@ class FileUploadResponse(BaseModel):
     file_id: int
     message: str
     task_id: Optional[str] = None
+    deduplicated: bool = False
 
 @router.post("/upload", response_model=FileUploadResponse)
 async def upload_file(
     file: UploadFile = FastAPIFile(...),
     file_type_id: int = 1,
     batch_id: Optional[int] = None,
+    force_reprocess: bool = False,
     db: Session = Depends(get_db)
 ):
     if not file.filename.lower().endswith('.pdf'):
@@ -52,29 +56,27 @@ async def upload_file(
         db.refresh(batch)
         batch_id = batch.id
     
-    unique_name = f"{uuid.uuid4()}_{file.filename}"
+    # Only the name part: the client controls it and it becomes part of the storage path
+    unique_name = f"{uuid.uuid4()}_{os.path.basename(file.filename)}"
     
-    file_content = await file.read()
-    
-    # Ensure FTP directories exist
-    try:
-        ftp_service.ensure_base_directories()
-    except Exception as e:
-        raise HTTPException(status_code=500, detail=f"Failed to setup FTP directories: {str(e)}")
-    
-    # Upload to the specific files directory
+    # Stream the spooled upload to the files directory off the event loop,
+    # hashing the content on the way through. The target directory is created
+    # on first use and cached, so steady-state uploads skip the directory walk.
+    reader = HashingReader(file.file)
     try:
-        ftp_path = ftp_service.upload_pdf_file(file_content, unique_name)
+        await file.seek(0)
+        ftp_path = await io_executor.run(storage_service.upload_pdf_stream, reader, unique_name)
         if not ftp_path:
-            raise HTTPException(status_code=500, detail="Failed to upload file to FTP server - check server logs for details")
+            raise HTTPException(status_code=500, detail="Failed to upload file to storage - check server logs for details")
     except Exception as e:
-        raise HTTPException(status_code=500, detail=f"FTP upload error: {str(e)}")
+        raise HTTPException(status_code=500, detail=f"Storage upload error: {str(e)}")
     
     db_file = File(
         original_name=file.filename,
         unique_name=unique_name,
         file_type_id=file_type_id,
         ftp_path=ftp_path,
+        content_hash=reader.hexdigest(),
         status=FileStatus.UPLOADED
     )
     
@@ -82,7 +84,21 @@ async def upload_file(
     db.commit()
     db.refresh(db_file)
     
-    task_id = queue_service.enqueue_file_processing(db_file.id, file_type_id, batch_id)
+    # Byte-identical upload already processed with the current prompts: copy the result
+    if not force_reprocess:
+        source = dedup_service.find_reusable_result(db, db_file.content_hash, file_type)
+        if source:
+            dedup_service.reuse_result(db, db_file.id, source, batch_id)
+            db_file.status = FileStatus.COMPLETED
+            db.commit()
+            
+            return FileUploadResponse(
+                file_id=db_file.id,
+                message=f"File matches previously processed file {source.file_id}; results reused",
+                deduplicated=True
+            )
+    
+    task_id = queue_service.enqueue_file_processing(db_file.id, file_type_id, batch_id, force_reprocess)
     
     db_file.status = FileStatus.QUEUED
     db.commit()
@@ -1,5 +1,9 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from app.core.database import get_db
+from app.services.metrics_service import metrics_service
 from app.services.queue_service import queue_service
+from app.services.text_cache_service import text_cache_service
 
 router = APIRouter()
 
@@ -12,6 +16,16 @@ def cancel_task(task_id: str):
     success = queue_service.cancel_task(task_id)
     return {"success": success, "message": "Task cancelled" if success else "Failed to cancel task"}
 
+@router.get("/metrics")
+def get_metrics():
+    """Cluster-wide counters recorded by the API and workers (cache hits/misses etc.)"""
+    return metrics_service.get_all()
+
+@router.get("/text-cache")
+def get_text_cache_stats(db: Session = Depends(get_db)):
+    """Size accounting of the extracted-text cache"""
+    return text_cache_service.stats(db)
+
 @router.get("/queue/length")
 def get_queue_length():
     length = queue_service.get_queue_length()
@@ -17,4 +17,13 @@ celery_app.conf.update(
     task_track_started=True,
     task_reject_on_worker_lost=True,
     result_expires=3600,
+    worker_pool=settings.celery_worker_pool,
+    worker_concurrency=settings.celery_worker_concurrency,
+    # Staged pipeline: size CPU-bound extract workers and I/O-bound llm workers separately
+    task_routes={
+        "app.tasks.fetch_document_task": {"queue": "fetch"},
+        "app.tasks.extract_document_task": {"queue": "extract"},
+        "app.tasks.llm_document_task": {"queue": "llm"},
+        "app.tasks.persist_document_task": {"queue": "persist"},
+    },
 )
\ No newline at end of file
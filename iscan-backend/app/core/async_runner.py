@@ -0,0 +1,30 @@
+import asyncio
+import os
+import threading
+from typing import Any, Coroutine, Optional
+
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_pid: Optional[int] = None
+_lock = threading.Lock()
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    """This process's persistent event loop, running on its own thread; recreated after a fork"""
+    global _loop, _loop_pid
+
+    with _lock:
+        if _loop is None or _loop.is_closed() or _loop_pid != os.getpid():
+            _loop = asyncio.new_event_loop()
+            _loop_pid = os.getpid()
+            threading.Thread(target=_loop.run_forever, name="async-runner", daemon=True).start()
+        return _loop
+
+def run_async(coro: Coroutine) -> Any:
+    """Run a coroutine to completion from sync code (e.g. a Celery task).
+
+    Unlike asyncio.run, the loop is kept between calls so clients bound to
+    it, like the shared LLM client's connection pool, survive across tasks.
+    Any number of threads can call this at once (Celery's threads pool):
+    their coroutines share the one loop, so a single worker process keeps
+    as many LLM calls in flight as it has task threads.
+    """
+    return asyncio.run_coroutine_threadsafe(coro, get_event_loop()).result()
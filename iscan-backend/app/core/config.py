@@ -9,6 +9,14 @@ class Settings(BaseSettings):
     database_url: str
     redis_url: str
     
+    # Connection pool per process; with the threads worker pool it needs one connection per task thread
+    database_pool_size: int = 5
+    database_max_overflow: int = 10
+    
+    # Storage backend: "ftp" or "local" (a local or NFS-mounted directory)
+    storage_backend: str = "ftp"
+    local_storage_root: str = "/data/iscan"
+    
     # FTP settings - optional for Railway deployment
     ftp_host: Optional[str] = None
     ftp_user: Optional[str] = None
@@ -17,12 +25,109 @@ class Settings(BaseSettings):
     ftp_base_path: str = "/Marketplace/scan_ai"
     ftp_files_path: str = "/Marketplace/scan_ai/files"
     ftp_csv_path: str = "/Marketplace/scan_ai/csvs"
+    ftp_timeout: float = 30.0
+    
+    # PDFs are stored under ftp_files_path/<shard>/<shard>/; 0 levels keeps a flat directory
+    ftp_shard_levels: int = 2
+    ftp_shard_width: int = 2
+    
+    # FTP connection pool - set ftp_pool_size to 0 to open a session per operation
+    ftp_pool_size: int = 4
+    ftp_pool_idle_timeout: float = 60.0
+    ftp_pool_health_check_interval: float = 5.0
+    
+    # Upload streaming settings
+    upload_chunk_size: int = 1024 * 1024
+    storage_io_workers: int = 8
+    
+    # Worker-local LRU cache of downloaded documents; 0 bytes disables it
+    document_cache_dir: str = "/tmp/iscan-document-cache"
+    document_cache_max_bytes: int = 2 * 1024 * 1024 * 1024
+    document_cache_evict_interval: int = 60
+    document_cache_evict_grace: int = 300
+    
+    # Opt-in: while a document waits on the LLM, reserve and pre-extract the next queued one
+    worker_prefetch_enabled: bool = False
+    worker_prefetch_max_chain: int = 20
+    worker_prefetch_claim_ttl: int = 3600
+    worker_prefetch_heartbeat_ttl: int = 60
+    worker_prefetch_max_pending: int = 10000
+    worker_prefetch_skip_ttl: int = 7 * 24 * 3600
+    worker_prefetch_recover_interval: int = 30
+    
+    # Documents with at least this many pages are extracted in a process pool; 0 disables it
+    extraction_parallel_min_pages: int = 64
+    extraction_workers: int = 0  # 0 = one per CPU
+    
+    # Keyword page selection stops scanning after this many matching pages unless the file type sets it
+    page_selection_max_keyword_pages: int = 10
+    
+    # Pages with under ocr_min_text_chars of text and this much image coverage are OCR'd with Tesseract
+    ocr_enabled: bool = True
+    ocr_language: str = "eng"
+    ocr_dpi: int = 300
+    ocr_workers: int = 2
+    ocr_min_text_chars: int = 20
+    ocr_min_image_coverage: float = 0.5
+    
+    # Extracted text kept in the database by content hash; 0 bytes disables the cache
+    text_cache_max_bytes: int = 5 * 1024 * 1024 * 1024
+    text_cache_compression_level: int = 6
+    text_cache_evict_interval: int = 60
+    
+    # Whitespace normalization and header/footer removal before the LLM call
+    text_compaction_enabled: bool = True
+    compaction_repeat_min_pages: int = 3
     
     openai_api_key: str
+    openai_model: str = "gpt-4o"
+    # Point at an OpenAI-compatible endpoint (proxy, mock server); None uses api.openai.com
+    openai_base_url: Optional[str] = None
+    openai_timeout: float = 120.0
+    openai_connect_timeout: float = 10.0
+    openai_max_connections: int = 20
+    openai_max_retries: int = 2
+    
+    # Cluster-wide LLM rate limit shared through Redis; 0 RPM or TPM disables it
+    llm_rate_limit_rpm: int = 0
+    llm_rate_limit_tpm: int = 0
+    llm_rate_limit_min_factor: float = 0.1
+    llm_rate_limit_increase: float = 0.01
+    llm_rate_limit_retries: int = 5
+    llm_expected_completion_tokens: int = 1000
+    
+    # Defaults for file types with "chunking" enabled in processing_prompts
+    llm_chunk_max_tokens: int = 24000
+    llm_chunk_concurrency: int = 4
+    
+    # Defaults for file types with "packing" enabled; files per packed Celery task
+    llm_pack_max_tokens: int = 8000
+    llm_pack_max_documents: int = 20
+    llm_pack_task_size: int = 100
+    
+    # Offline batches through the provider's batch API
+    provider_batch_completion_window: str = "24h"
+    provider_batch_poll_interval: int = 300
+    
+    # Default structured output for file types without "structured_output": off, json_object or json_schema
+    llm_structured_output: str = "json_object"
+    
+    # Redis cache of LLM responses; a TTL or entry cap of 0 disables it
+    llm_cache_ttl: int = 7 * 24 * 3600
+    llm_cache_max_entries: int = 100000
     
     celery_broker_url: Optional[str] = None
     celery_result_backend: Optional[str] = None
     
+    # Run each document as a chain of tasks on the fetch, extract, llm and persist queues
+    pipeline_stages_enabled: bool = False
+    pipeline_handoff_ttl: int = 24 * 3600
+    
+    # "prefork" runs one document per process; "threads" runs celery_worker_concurrency
+    # documents per process, their LLM calls sharing the process's event loop
+    celery_worker_pool: str = "prefork"
+    celery_worker_concurrency: Optional[int] = None
+    
     # Railway deployment settings
     port: int = 8000
     host: str = "0.0.0.0"
@@ -3,7 +3,12 @@ from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import sessionmaker
 from .config import settings
 
-engine = create_engine(settings.database_url)
+# SQLite's pools don't take sizing arguments
+engine_options = {} if settings.database_url.startswith("sqlite") else {
+    "pool_size": settings.database_pool_size,
+    "max_overflow": settings.database_max_overflow,
+}
+engine = create_engine(settings.database_url, **engine_options)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
@@ -0,0 +1,121 @@
+import json
+from typing import Any, Dict, List, Optional
+from app.langgraph.text_compaction import count_tokens
+
+MERGE_RULES = ("first", "last", "concat", "union", "sum", "max", "min")
+
+def chunking_enabled(chunking: Optional[Dict[str, Any]]) -> bool:
+    """True when processing_prompts["chunking"] is present and not switched off"""
+    return bool(chunking) and chunking.get("enabled", True)
+
+def validate_chunking(chunking: Optional[Dict[str, Any]], compaction: Optional[Dict[str, Any]] = None):
+    """Raise ValueError unless chunking is a valid processing_prompts["chunking"]"""
+    if chunking is None:
+        return
+    if not isinstance(chunking, dict):
+        raise ValueError("chunking must be an object")
+
+    unknown = set(chunking) - {"enabled", "max_chunk_tokens", "max_concurrency"}
+    if unknown:
+        raise ValueError(f"Unknown chunking keys: {', '.join(sorted(unknown))}")
+    if not isinstance(chunking.get("enabled", True), bool):
+        raise ValueError("chunking.enabled must be a boolean")
+    for key in ("max_chunk_tokens", "max_concurrency"):
+        value = chunking.get(key, 1)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"chunking.{key} must be a positive integer")
+    # Chunked mode extracts the whole document, so a compaction cut would drop text only below the chunk threshold
+    if chunking_enabled(chunking) and isinstance(compaction, dict) and compaction.get("max_tokens"):
+        raise ValueError("compaction.max_tokens cannot be combined with chunking; disable one of them")
+
+def validate_merge_rules(merge_rules: Optional[Dict[str, Any]]):
+    """Raise ValueError unless merge_rules maps field names to known rules"""
+    if merge_rules is None:
+        return
+    if not isinstance(merge_rules, dict):
+        raise ValueError("merge_rules must be an object")
+    for field, rule in merge_rules.items():
+        if rule not in MERGE_RULES:
+            raise ValueError(f"merge_rules.{field} must be one of: {', '.join(MERGE_RULES)}")
+
+def _split_oversized(text: str, max_tokens: int) -> List[str]:
+    """Split one page that alone exceeds the budget at paragraph, then line, boundaries"""
+    for separator in ("\n\n", "\n"):
+        parts = text.split(separator)
+        if len(parts) > 1:
+            return pack_chunks(parts, max_tokens, separator)
+
+    # One unbroken run of text: cut by characters at the text's own chars-per-token ratio
+    chars_per_token = len(text) / max(count_tokens(text), 1)
+    size = max(1, int(max_tokens * chars_per_token * 0.9))
+    return [text[start:start + size] for start in range(0, len(text), size)]
+
+def pack_chunks(parts: List[str], max_tokens: int, separator: str = "\n\n") -> List[str]:
+    """Greedily pack consecutive parts (pages, sections) into chunks under max_tokens"""
+    chunks = []
+    current: List[str] = []
+    current_tokens = 0
+    separator_tokens = count_tokens(separator)
+
+    for part in parts:
+        if not part:
+            continue
+        tokens = count_tokens(part)
+        if tokens > max_tokens:
+            if current:
+                chunks.append(separator.join(current))
+                current, current_tokens = [], 0
+            chunks.extend(_split_oversized(part, max_tokens))
+            continue
+        if current and current_tokens + separator_tokens + tokens > max_tokens:
+            chunks.append(separator.join(current))
+            current, current_tokens = [], 0
+        current.append(part)
+        current_tokens += tokens + (separator_tokens if len(current) > 1 else 0)
+
+    if current:
+        chunks.append(separator.join(current))
+    return chunks
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+def _merge_field(values: List[Any], rule: str) -> Any:
+    present = [value for value in values if not _is_empty(value)]
+    if not present:
+        return values[0] if values else None
+
+    if rule == "first":
+        return present[0]
+    if rule == "last":
+        return present[-1]
+    if rule in ("concat", "union"):
+        merged = []
+        seen = set()
+        for value in present:
+            for item in (value if isinstance(value, list) else [value]):
+                marker = json.dumps(item, sort_keys=True, default=str)
+                if rule == "union" and marker in seen:
+                    continue
+                seen.add(marker)
+                merged.append(item)
+        return merged
+
+    numbers = [value for value in present if isinstance(value, (int, float)) and not isinstance(value, bool)]
+    if not numbers:
+        return present[0]
+    if rule == "sum":
+        return sum(numbers)
+    return max(numbers) if rule == "max" else min(numbers)
+
+def merge_results(results: List[Dict[str, Any]], merge_rules: Optional[Dict[str, str]] = None) -> Dict[str, Any]:
+    """Combine per-chunk JSON results field by field; fields without a rule keep the first value found"""
+    merge_rules = merge_rules or {}
+    fields: List[str] = []
+    for result in results:
+        fields.extend(field for field in result if field not in fields)
+
+    return {
+        field: _merge_field([result.get(field) for result in results if field in result], merge_rules.get(field, "first"))
+        for field in fields
+    }
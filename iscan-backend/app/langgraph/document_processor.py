@@ -1,110 +1,280 @@
+import asyncio
 import json
-import pymupdf
-from typing import Dict, Any, List, TypedDict
+import logging
+import re
+import time
+from typing import Dict, Any, List, Optional, Tuple, TypedDict
 from langgraph.graph import StateGraph, END
-from langchain_openai import ChatOpenAI
 from langchain_core.messages import HumanMessage, SystemMessage
 from app.core.config import settings
+from app.langgraph.chunking import chunking_enabled, merge_results, pack_chunks
+from app.langgraph.model_routing import escalation_model, select_model
+from app.langgraph.packing import pack_prompts, pack_text, plan_packs, split_pack_result
+from app.langgraph.structured_output import build_response_format
+from app.langgraph.text_compaction import compact_pages, count_tokens
+from app.langgraph.text_extraction import extract_pages
+from app.services.llm_cache_service import llm_cache_service
+from app.services.llm_client import llm_client
+from app.services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
 
 class DocumentState(TypedDict):
-    file_content: bytes
+    file_content: Optional[bytes]
+    file_path: Optional[str]
+    page_texts: List[str]
     extracted_text: str
+    file_type: Optional[str]
     file_type_prompts: Dict[str, Any]
     processing_result: Dict[str, Any]
     error: str
+    model: str
+    escalated: bool
+    bypass_llm_cache: bool
+    metrics: Dict[str, Any]
+
+def record_timing(metrics: Dict[str, Any], stage: str, started: float):
+    """Store a stage's wall-clock [start, end] so overlapping stages can be compared"""
+    metrics.setdefault("timings", {})[stage] = [round(started, 3), round(time.time(), 3)]
 
 def extract_text_node(state: DocumentState) -> DocumentState:
+    # Text extracted ahead of time (text cache, prefetching worker) skips the PDF entirely
+    if not state["file_path"] and state["file_content"] is None:
+        return state
+
+    started = time.time()
     try:
-        pdf_document = pymupdf.open(stream=state["file_content"], filetype="pdf")
+        state["page_texts"] = extract_pages(
+            state["file_path"],
+            state["file_content"],
+            state["file_type_prompts"].get("page_selection"),
+            stats=state["metrics"]
+        )
+    except Exception as e:
+        state["error"] = f"PDF extraction failed: {str(e)}"
+    record_timing(state["metrics"], "extract", started)
+
+    return state
 
-        extracted_text = ""
-        for page_num in range(pdf_document.page_count):
-            page = pdf_document[page_num]
-            extracted_text += page.get_text() + "\n"
+def compact_text_node(state: DocumentState) -> DocumentState:
+    if state["error"]:
+        return state
 
-        pdf_document.close()
-        state["extracted_text"] = extracted_text.strip()
+    # Pre-joined text (no page boundaries) is compacted as a single page
+    page_texts = state["page_texts"] or [state["extracted_text"]]
+    compaction = state["file_type_prompts"].get("compaction")
+    if compaction and compaction.get("max_tokens") and chunking_enabled(state["file_type_prompts"].get("chunking")):
+        # Chunking decides on the full compacted text; a cut here would only hit documents below the threshold
+        compaction = {**compaction, "max_tokens": 0}
+    started = time.time()
+    pages, text, stats = compact_pages(page_texts, compaction)
+    record_timing(state["metrics"], "compact", started)
+    state["metrics"].update(stats)
+    logger.info(f"Compaction: {stats['tokens_before']} -> {stats['tokens_after']} tokens")
 
-    except Exception as e:
-        state["error"] = f"PDF extraction failed: {str(e)}"
+    if not text:
+        # Nothing to extract from; don't pay for an LLM call on an empty prompt
+        state["error"] = "No text could be extracted from the document"
+        return state
 
+    state["page_texts"] = pages
+    state["extracted_text"] = text
     return state
 
-def process_with_chatgpt_node(state: DocumentState) -> DocumentState:
+def parse_llm_response(content: str) -> Dict[str, Any]:
+    """JSON object from an LLM reply, or the raw reply flagged with parsing_error"""
+    # Try to extract JSON from the response
+    try:
+        # First, try to parse the response directly as JSON
+        return json.loads(content)
+    except json.JSONDecodeError:
+        # If direct parsing fails, try to extract JSON from markdown code blocks
+        try:
+            content = content.strip()
+
+            # Look for JSON code blocks
+            if "```json" in content:
+                # Extract content between ```json and ```
+                start = content.find("```json") + 7
+                end = content.find("```", start)
+                if end != -1:
+                    json_content = content[start:end].strip()
+                    return json.loads(json_content)
+                else:
+                    raise json.JSONDecodeError("Could not find closing ```", content, 0)
+            elif "```" in content:
+                # Try generic code blocks
+                start = content.find("```") + 3
+                end = content.find("```", start)
+                if end != -1:
+                    json_content = content[start:end].strip()
+                    return json.loads(json_content)
+                else:
+                    raise json.JSONDecodeError("Could not find closing ```", content, 0)
+            else:
+                # Try to find JSON-like content in the response
+                json_match = re.search(r'(\{.*\})', content, re.DOTALL)
+                if json_match:
+                    json_content = json_match.group(1)
+                    return json.loads(json_content)
+                else:
+                    raise json.JSONDecodeError("No JSON found in response", content, 0)
+
+        except (json.JSONDecodeError, IndexError, AttributeError):
+            # If all parsing attempts fail, store raw response with error
+            return {
+                "raw_response": content,
+                "parsing_error": "Failed to extract valid JSON from ChatGPT response"
+            }
+
+async def _record_parse(state: DocumentState, content: str, result: Dict[str, Any]):
+    """Count replies per file type that parsed directly, needed the fallback parser, or failed"""
+    try:
+        json.loads(content)
+        outcome = "direct"
+    except json.JSONDecodeError:
+        outcome = "failures" if "parsing_error" in result else "recovered"
+    await metrics_service.aincr(f"llm_parse:{state['file_type'] or 'unknown'}", "responses")
+    await metrics_service.aincr(f"llm_parse:{state['file_type'] or 'unknown'}", outcome)
+
+def build_prompt(prompts: Dict[str, Any], text: str) -> Tuple[str, str, Optional[Dict[str, Any]]]:
+    """System prompt, user message and response_format for extracting one piece of text"""
+    system_prompt = prompts.get("system_prompt", "")
+    extraction_prompt = prompts.get("extraction_prompt", "")
+    response_format = build_response_format(prompts)
+
+    # JSON modes are rejected by the API unless the messages mention JSON
+    if response_format and "json" not in f"{system_prompt} {extraction_prompt}".lower():
+        system_prompt = f"{system_prompt}\nRespond with a single JSON object.".strip()
+
+    return system_prompt, f"{extraction_prompt}\n\nDocument text:\n{text}", response_format
+
+async def _complete(state: DocumentState, text: str) -> Tuple[Dict[str, Any], bool]:
+    """Parsed LLM result for one piece of document text, and whether it came from the cache"""
+    model = state["model"]
+    system_prompt = state["file_type_prompts"].get("system_prompt", "")
+    extraction_prompt = state["file_type_prompts"].get("extraction_prompt", "")
+    response_format = build_response_format(state["file_type_prompts"])
+
+    # Reruns of unchanged text and prompts are answered from the cache
+    cache_key = llm_cache_service.make_key(
+        model, system_prompt, extraction_prompt, text, response_format=response_format
+    )
+    content = None if state["bypass_llm_cache"] else await llm_cache_service.aget(cache_key)
+    if content is not None:
+        return parse_llm_response(content), True
+
+    system_prompt, user_message, response_format = build_prompt(state["file_type_prompts"], text)
+    messages = [
+        SystemMessage(content=system_prompt),
+        HumanMessage(content=user_message)
+    ]
+    estimated_tokens = (
+        count_tokens(system_prompt) + count_tokens(user_message) + settings.llm_expected_completion_tokens
+    )
+    kwargs = {"response_format": response_format} if response_format else {}
+    response = await llm_client.ainvoke(messages, estimated_tokens, model, **kwargs)
+
+    # Constrained output is plain JSON; the fence/regex recovery remains for unconstrained replies
+    result = parse_llm_response(response.content)
+    await _record_parse(state, response.content, result)
+
+    # Unparseable replies aren't cached so a rerun gets another chance
+    if "parsing_error" not in result:
+        await llm_cache_service.aput(cache_key, response.content)
+    return result, False
+
+def _chunks(state: DocumentState) -> List[str]:
+    """Page-aligned chunks when the file type enables chunking and the text exceeds one chunk"""
+    chunking = state["file_type_prompts"].get("chunking")
+    if not chunking_enabled(chunking):
+        return [state["extracted_text"]]
+
+    max_tokens = chunking.get("max_chunk_tokens", settings.llm_chunk_max_tokens)
+    if state["metrics"].get("tokens_after", 0) <= max_tokens:
+        return [state["extracted_text"]]
+    return pack_chunks(state["page_texts"] or [state["extracted_text"]], max_tokens)
+
+async def process_with_chatgpt_node(state: DocumentState) -> DocumentState:
     if state["error"]:
         return state
 
     try:
-        llm = ChatOpenAI(
-            model="gpt-4o",
-            api_key=settings.openai_api_key,
-            temperature=0
-        )
+        chunks = _chunks(state)
+        started = time.time()
 
-        system_prompt = state["file_type_prompts"].get("system_prompt", "")
-        extraction_prompt = state["file_type_prompts"].get("extraction_prompt", "")
+        if len(chunks) == 1:
+            state["processing_result"], cached = await _complete(state, chunks[0])
+            state["metrics"]["llm_cache_hit"] = cached
+        else:
+            # Map: chunk extractions run concurrently, so latency is bounded by the slowest chunk
+            concurrency = state["file_type_prompts"]["chunking"].get("max_concurrency", settings.llm_chunk_concurrency)
+            semaphore = asyncio.Semaphore(concurrency)
 
-        messages = [
-            SystemMessage(content=system_prompt),
-            HumanMessage(content=f"{extraction_prompt}\n\nDocument text:\n{state['extracted_text']}")
-        ]
+            async def extract_chunk(index: int, chunk: str):
+                async with semaphore:
+                    return await _complete(state, f"[Part {index + 1} of {len(chunks)}]\n{chunk}")
 
-        response = llm.invoke(messages)
+            outcomes = await asyncio.gather(*(extract_chunk(index, chunk) for index, chunk in enumerate(chunks)))
+            parsed = [result for result, _ in outcomes if "parsing_error" not in result]
+            failed = [index for index, (result, _) in enumerate(outcomes) if "parsing_error" in result]
 
-        # Try to extract JSON from the response
-        try:
-            # First, try to parse the response directly as JSON
-            result_json = json.loads(response.content)
-            state["processing_result"] = result_json
-        except json.JSONDecodeError:
-            # If direct parsing fails, try to extract JSON from markdown code blocks
-            try:
-                content = response.content.strip()
-
-                # Look for JSON code blocks
-                if "```json" in content:
-                    # Extract content between ```json and ```
-                    start = content.find("```json") + 7
-                    end = content.find("```", start)
-                    if end != -1:
-                        json_content = content[start:end].strip()
-                        result_json = json.loads(json_content)
-                        state["processing_result"] = result_json
-                    else:
-                        raise json.JSONDecodeError("Could not find closing ```", content, 0)
-                elif "```" in content:
-                    # Try generic code blocks
-                    start = content.find("```") + 3
-                    end = content.find("```", start)
-                    if end != -1:
-                        json_content = content[start:end].strip()
-                        result_json = json.loads(json_content)
-                        state["processing_result"] = result_json
-                    else:
-                        raise json.JSONDecodeError("Could not find closing ```", content, 0)
-                else:
-                    # Try to find JSON-like content in the response
-                    import re
-                    json_match = re.search(r'(\{.*\})', content, re.DOTALL)
-                    if json_match:
-                        json_content = json_match.group(1)
-                        result_json = json.loads(json_content)
-                        state["processing_result"] = result_json
-                    else:
-                        raise json.JSONDecodeError("No JSON found in response", content, 0)
-
-            except (json.JSONDecodeError, IndexError, AttributeError):
-                # If all parsing attempts fail, store raw response with error
-                state["processing_result"] = {
-                    "raw_response": response.content,
-                    "parsing_error": "Failed to extract valid JSON from ChatGPT response"
-                }
+            # Reduce: per-field merge rules from processing_prompts
+            if parsed:
+                state["processing_result"] = merge_results(parsed, state["file_type_prompts"].get("merge_rules"))
+                if failed:
+                    state["processing_result"]["chunk_errors"] = [
+                        f"Failed to extract valid JSON from part {index + 1}" for index in failed
+                    ]
+            else:
+                state["processing_result"] = outcomes[0][0]
+            state["metrics"]["llm_chunks"] = len(chunks)
+            state["metrics"]["llm_cache_hit"] = all(cached for _, cached in outcomes)
+
+        if not state["metrics"]["llm_cache_hit"]:
+            record_timing(state["metrics"], "llm", started)
 
     except Exception as e:
         state["error"] = f"ChatGPT processing failed: {str(e)}"
 
     return state
 
+def route_model_node(state: DocumentState) -> DocumentState:
+    if state["error"]:
+        return state
+
+    state["model"] = select_model(
+        state["file_type_prompts"],
+        state["metrics"].get("tokens_after", 0),
+        len(state["page_texts"])
+    )
+    state["metrics"]["model_used"] = state["model"]
+    metrics_service.incr(f"llm_model:{state['file_type'] or 'unknown'}", state["model"])
+    return state
+
+def _needs_escalation(state: DocumentState) -> Optional[str]:
+    """Escalation model when the result is missing required fields or unparseable"""
+    if state["error"] or state["escalated"]:
+        return None
+    result = state["processing_result"]
+    if not result.get("validation_errors") and "parsing_error" not in result:
+        return None
+    return escalation_model(state["file_type_prompts"], state["model"])
+
+def escalate_model_node(state: DocumentState) -> DocumentState:
+    model = _needs_escalation(state)
+    logger.info(f"Escalating from {state['model']} to {model} after failed validation")
+    state["model"] = model
+    state["escalated"] = True
+    state["processing_result"] = {}
+    state["metrics"]["model_used"] = model
+    state["metrics"]["escalated"] = True
+    metrics_service.incr(f"llm_model:{state['file_type'] or 'unknown'}", "escalations")
+    return state
+
+def after_validation(state: DocumentState) -> str:
+    return "escalate" if _needs_escalation(state) else "done"
+
 def validate_result_node(state: DocumentState) -> DocumentState:
     if state["error"]:
         return state
@@ -113,45 +283,166 @@ def validate_result_node(state: DocumentState) -> DocumentState:
         state["error"] = "No processing result generated"
         return state
 
-    required_fields = state["file_type_prompts"].get("required_fields", [])
+    check_required_fields(state["processing_result"], state["file_type_prompts"])
+    return state
 
-    for field in required_fields:
-        if field not in state["processing_result"]:
-            if "validation_errors" not in state["processing_result"]:
-                state["processing_result"]["validation_errors"] = []
-            state["processing_result"]["validation_errors"].append(f"Missing required field: {field}")
+def check_required_fields(result: Dict[str, Any], prompts: Dict[str, Any]):
+    required_fields = prompts.get("required_fields", [])
 
-    return state
+    for field in required_fields:
+        if field not in result:
+            if "validation_errors" not in result:
+                result["validation_errors"] = []
+            result["validation_errors"].append(f"Missing required field: {field}")
 
 def create_document_processor():
     workflow = StateGraph(DocumentState)
 
     workflow.add_node("extract_text", extract_text_node)
+    workflow.add_node("compact_text", compact_text_node)
+    workflow.add_node("route_model", route_model_node)
     workflow.add_node("process_with_chatgpt", process_with_chatgpt_node)
     workflow.add_node("validate_result", validate_result_node)
+    workflow.add_node("escalate_model", escalate_model_node)
 
     workflow.set_entry_point("extract_text")
 
-    workflow.add_edge("extract_text", "process_with_chatgpt")
+    workflow.add_edge("extract_text", "compact_text")
+    workflow.add_edge("compact_text", "route_model")
+    workflow.add_edge("route_model", "process_with_chatgpt")
     workflow.add_edge("process_with_chatgpt", "validate_result")
-    workflow.add_edge("validate_result", END)
+    # A cheap model's incomplete result is retried once with the stronger model
+    workflow.add_conditional_edges(
+        "validate_result",
+        after_validation,
+        {"escalate": "escalate_model", "done": END}
+    )
+    workflow.add_edge("escalate_model", "process_with_chatgpt")
 
     return workflow.compile()
 
 document_processor = create_document_processor()
 
-async def process_document(file_content: bytes, file_type_prompts: Dict[str, Any]) -> Dict[str, Any]:
+async def process_document(
+    file_content: Optional[bytes],
+    file_type_prompts: Dict[str, Any],
+    file_path: Optional[str] = None,
+    page_texts: Optional[List[str]] = None,
+    metrics: Optional[Dict[str, Any]] = None,
+    bypass_llm_cache: bool = False,
+    file_type: Optional[str] = None
+) -> Dict[str, Any]:
+    """Run the graph; stage timings and counters are merged into metrics when given"""
     state: DocumentState = {
         "file_content": file_content,
+        "file_path": file_path,
+        "page_texts": page_texts or [],
         "extracted_text": "",
+        "file_type": file_type,
         "file_type_prompts": file_type_prompts,
         "processing_result": {},
-        "error": ""
+        "error": "",
+        "model": settings.openai_model,
+        "escalated": False,
+        "bypass_llm_cache": bypass_llm_cache,
+        "metrics": {}
     }
 
     final_state = await document_processor.ainvoke(state)
 
+    if metrics is not None:
+        for key, value in final_state["metrics"].items():
+            if isinstance(value, dict) and isinstance(metrics.get(key), dict):
+                metrics[key].update(value)
+            else:
+                metrics[key] = value
+
     if final_state["error"]:
         return {"error": final_state["error"]}
 
     return final_state["processing_result"]
+
+async def _process_pack(
+    texts: List[str],
+    pages: int,
+    file_type_prompts: Dict[str, Any],
+    bypass_llm_cache: bool,
+    file_type: Optional[str]
+) -> Tuple[List[Optional[Dict[str, Any]]], str]:
+    """Per-document results of one packed request (None where a document must be redone) and the model used"""
+    prompts = pack_prompts(file_type_prompts, len(texts))
+    text = pack_text(texts)
+    model = select_model(file_type_prompts, count_tokens(text), pages)
+    state = {"file_type_prompts": prompts, "model": model, "bypass_llm_cache": bypass_llm_cache, "file_type": file_type}
+
+    result, _ = await _complete(state, text)
+    results = split_pack_result(result, len(texts))
+    if results is None:
+        logger.warning(f"Could not split the reply for a pack of {len(texts)} documents, processing them individually")
+        return [None] * len(texts), model
+
+    for index, document in enumerate(results):
+        if document is None:
+            continue
+        check_required_fields(document, file_type_prompts)
+        # Incomplete results go through single-document processing, which escalates
+        if document.get("validation_errors") and escalation_model(file_type_prompts, model):
+            results[index] = None
+    return results, model
+
+async def process_packed_documents(
+    documents: List[List[str]],
+    file_type_prompts: Dict[str, Any],
+    metrics: List[Dict[str, Any]],
+    bypass_llm_cache: bool = False,
+    file_type: Optional[str] = None
+) -> List[Optional[Dict[str, Any]]]:
+    """Extract many small documents' page texts with several documents per LLM request.
+
+    Returns one result per document; None marks documents that didn't fit a pack or whose
+    pack reply couldn't be split, to be processed individually with process_document.
+    """
+    texts = []
+    pages = []
+    for page_texts, document_metrics in zip(documents, metrics):
+        started = time.time()
+        compacted, text, stats = compact_pages(page_texts, file_type_prompts.get("compaction"))
+        record_timing(document_metrics, "compact", started)
+        document_metrics.update(stats)
+        texts.append(text)
+        pages.append(len(compacted))
+
+    packing = file_type_prompts.get("packing") or {}
+    max_tokens = packing.get("max_pack_tokens", settings.llm_pack_max_tokens)
+    # Empty documents are kept out of packs so single processing reports them as failed
+    token_counts = [
+        document_metrics["tokens_after"] if text else max_tokens + 1
+        for text, document_metrics in zip(texts, metrics)
+    ]
+    packs = plan_packs(token_counts, max_tokens, packing.get("max_documents", settings.llm_pack_max_documents))
+    outcomes: List[Optional[Dict[str, Any]]] = [None] * len(documents)
+
+    async def run_pack(pack: List[int]):
+        started = time.time()
+        try:
+            results, model = await _process_pack(
+                [texts[index] for index in pack],
+                sum(pages[index] for index in pack),
+                file_type_prompts,
+                bypass_llm_cache,
+                file_type
+            )
+        except Exception as e:
+            logger.warning(f"Pack of {len(pack)} documents failed, processing them individually: {e}")
+            return
+        for index, result in zip(pack, results):
+            if result is not None:
+                record_timing(metrics[index], "llm", started)
+                metrics[index].update({"model_used": model, "llm_pack_size": len(pack)})
+                outcomes[index] = result
+
+    await asyncio.gather(*(run_pack(pack) for pack in packs))
+    await metrics_service.aincr(f"llm_pack:{file_type or 'unknown'}", "packs", len(packs))
+    await metrics_service.aincr(f"llm_pack:{file_type or 'unknown'}", "packed", sum(result is not None for result in outcomes))
+    await metrics_service.aincr(f"llm_pack:{file_type or 'unknown'}", "individual", sum(result is None for result in outcomes))
+    return outcomes
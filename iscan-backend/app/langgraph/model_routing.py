@@ -0,0 +1,58 @@
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+CONDITIONS = ("min_tokens", "max_tokens", "min_pages", "max_pages")
+
+def validate_model_routing(model_routing: Optional[Dict[str, Any]]):
+    """Raise ValueError unless model_routing is a valid processing_prompts["model_routing"]"""
+    if model_routing is None:
+        return
+    if not isinstance(model_routing, dict):
+        raise ValueError("model_routing must be an object")
+
+    unknown = set(model_routing) - {"rules", "default_model", "escalation_model", "escalate_on_validation_failure"}
+    if unknown:
+        raise ValueError(f"Unknown model_routing keys: {', '.join(sorted(unknown))}")
+    for key in ("default_model", "escalation_model"):
+        if key in model_routing and not (isinstance(model_routing[key], str) and model_routing[key]):
+            raise ValueError(f"model_routing.{key} must be a model name")
+    if not isinstance(model_routing.get("escalate_on_validation_failure", True), bool):
+        raise ValueError("model_routing.escalate_on_validation_failure must be a boolean")
+
+    rules = model_routing.get("rules", [])
+    if not isinstance(rules, list):
+        raise ValueError("model_routing.rules must be a list")
+    for index, rule in enumerate(rules):
+        if not isinstance(rule, dict) or not isinstance(rule.get("model"), str) or not rule["model"]:
+            raise ValueError(f"model_routing.rules[{index}] must be an object with a model name")
+        unknown = set(rule) - {"model", *CONDITIONS}
+        if unknown:
+            raise ValueError(f"Unknown keys in model_routing.rules[{index}]: {', '.join(sorted(unknown))}")
+        for condition in CONDITIONS:
+            value = rule.get(condition, 0)
+            if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+                raise ValueError(f"model_routing.rules[{index}].{condition} must be a non-negative integer")
+
+def _matches(rule: Dict[str, Any], tokens: int, pages: int) -> bool:
+    return (
+        tokens >= rule.get("min_tokens", 0)
+        and ("max_tokens" not in rule or tokens <= rule["max_tokens"])
+        and pages >= rule.get("min_pages", 0)
+        and ("max_pages" not in rule or pages <= rule["max_pages"])
+    )
+
+def select_model(prompts: Dict[str, Any], tokens: int, pages: int) -> str:
+    """First routing rule matching the document's size, else the file type's or global default"""
+    model_routing = prompts.get("model_routing") or {}
+    for rule in model_routing.get("rules", []):
+        if _matches(rule, tokens, pages):
+            return rule["model"]
+    return model_routing.get("default_model", settings.openai_model)
+
+def escalation_model(prompts: Dict[str, Any], current_model: str) -> Optional[str]:
+    """Stronger model to retry with after a failed validation, or None if there is nowhere to go"""
+    model_routing = prompts.get("model_routing") or {}
+    if not model_routing.get("escalate_on_validation_failure", True):
+        return None
+    model = model_routing.get("escalation_model", settings.openai_model)
+    return model if model != current_model else None
@@ -0,0 +1,78 @@
+from typing import Any, Dict, List, Optional
+from app.langgraph.structured_output import derive_schema, structured_output_mode
+
+def validate_packing(packing: Optional[Dict[str, Any]]):
+    """Raise ValueError unless packing is a valid processing_prompts["packing"]"""
+    if packing is None:
+        return
+    if not isinstance(packing, dict):
+        raise ValueError("packing must be an object")
+
+    unknown = set(packing) - {"enabled", "max_pack_tokens", "max_documents"}
+    if unknown:
+        raise ValueError(f"Unknown packing keys: {', '.join(sorted(unknown))}")
+    if not isinstance(packing.get("enabled", True), bool):
+        raise ValueError("packing.enabled must be a boolean")
+    for key in ("max_pack_tokens", "max_documents"):
+        value = packing.get(key, 1)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+            raise ValueError(f"packing.{key} must be a positive integer")
+
+def packing_enabled(prompts: Dict[str, Any]) -> bool:
+    packing = prompts.get("packing")
+    return bool(packing) and packing.get("enabled", True)
+
+def plan_packs(token_counts: List[int], max_tokens: int, max_documents: int) -> List[List[int]]:
+    """Greedily group document indexes, in order, into packs under the token and document budgets.
+
+    Documents that alone exceed the budget are left out and processed one by one.
+    """
+    packs = []
+    current: List[int] = []
+    current_tokens = 0
+
+    for index, tokens in enumerate(token_counts):
+        if tokens > max_tokens:
+            continue
+        if current and (current_tokens + tokens > max_tokens or len(current) >= max_documents):
+            packs.append(current)
+            current, current_tokens = [], 0
+        current.append(index)
+        current_tokens += tokens
+
+    if current:
+        packs.append(current)
+    return packs
+
+def pack_text(texts: List[str]) -> str:
+    return "\n\n".join(f"=== DOCUMENT {index + 1} ===\n{text}" for index, text in enumerate(texts))
+
+def pack_prompts(prompts: Dict[str, Any], count: int) -> Dict[str, Any]:
+    """File type prompts rewritten to extract count delimited documents into one array"""
+    instruction = (
+        f"The text contains {count} separate documents, each starting with a line like "
+        f"=== DOCUMENT n ===. Extract each document independently as instructed and respond "
+        f'with a JSON object {{"documents": [...]}} holding exactly {count} results, in document order.'
+    )
+    packed = dict(prompts, system_prompt=f"{prompts.get('system_prompt', '')}\n\n{instruction}".strip())
+
+    structured_output = prompts.get("structured_output") or {}
+    if structured_output_mode(prompts) == "json_schema":
+        schema = structured_output.get("schema") or derive_schema(prompts.get("required_fields", []))
+        packed["structured_output"] = dict(structured_output, mode="json_schema", schema={
+            "type": "object",
+            "properties": {"documents": {"type": "array", "items": schema}},
+            "required": ["documents"],
+            "additionalProperties": False,
+        })
+    return packed
+
+def split_pack_result(result: Any, count: int) -> Optional[List[Optional[Dict[str, Any]]]]:
+    """Per-document results from a pack reply, or None when the reply can't be split.
+
+    Entries that aren't JSON objects are None, so only those documents are redone individually.
+    """
+    documents = result.get("documents") if isinstance(result, dict) else result
+    if not isinstance(documents, list) or len(documents) != count:
+        return None
+    return [document if isinstance(document, dict) else None for document in documents]
@@ -0,0 +1,80 @@
+from typing import Any, Dict, Optional
+from app.core.config import settings
+
+MODES = ("off", "json_object", "json_schema")
+
+def validate_structured_output(structured_output: Optional[Dict[str, Any]]):
+    """Raise ValueError unless structured_output is a valid processing_prompts["structured_output"]"""
+    if structured_output is None:
+        return
+    if not isinstance(structured_output, dict):
+        raise ValueError("structured_output must be an object")
+
+    unknown = set(structured_output) - {"mode", "schema", "strict"}
+    if unknown:
+        raise ValueError(f"Unknown structured_output keys: {', '.join(sorted(unknown))}")
+    mode = structured_output.get("mode")
+    if mode is not None and mode not in MODES:
+        raise ValueError(f"structured_output.mode must be one of: {', '.join(MODES)}")
+    schema = structured_output.get("schema")
+    if schema is not None and (not isinstance(schema, dict) or schema.get("type") != "object"):
+        raise ValueError('structured_output.schema must be a JSON Schema with "type": "object"')
+    strict = structured_output.get("strict", False)
+    if not isinstance(strict, bool):
+        raise ValueError("structured_output.strict must be a boolean")
+    if strict:
+        _validate_strict_schema(mode, schema)
+
+def _validate_strict_schema(mode: Optional[str], schema: Optional[Dict[str, Any]]):
+    """Strict mode rejects untyped properties, so it needs a complete schema rather than a derived one"""
+    if mode not in (None, "json_schema"):
+        raise ValueError("structured_output.strict requires mode json_schema")
+    if schema is None:
+        raise ValueError("structured_output.strict requires an explicit schema")
+    properties = schema.get("properties")
+    if not isinstance(properties, dict) or not properties:
+        raise ValueError("structured_output.schema must define properties in strict mode")
+    untyped = [
+        name for name, definition in properties.items()
+        if not isinstance(definition, dict) or not {"type", "anyOf", "$ref", "enum"} & set(definition)
+    ]
+    if untyped:
+        raise ValueError(f"structured_output.schema properties need a type in strict mode: {', '.join(untyped)}")
+    if schema.get("additionalProperties") is not False:
+        raise ValueError('structured_output.schema needs "additionalProperties": false in strict mode')
+    if set(schema.get("required") or []) != set(properties):
+        raise ValueError("structured_output.schema must list every property in required in strict mode")
+
+def derive_schema(required_fields: list) -> Dict[str, Any]:
+    """Loose object schema requiring required_fields; other fields stay allowed"""
+    return {
+        "type": "object",
+        "properties": {field: {} for field in required_fields},
+        "required": list(required_fields),
+        "additionalProperties": True,
+    }
+
+def structured_output_mode(prompts: Dict[str, Any]) -> str:
+    structured_output = prompts.get("structured_output") or {}
+    # An explicit schema implies json_schema; otherwise the deployment default applies
+    default_mode = "json_schema" if structured_output.get("schema") else settings.llm_structured_output
+    return structured_output.get("mode", default_mode)
+
+def build_response_format(prompts: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+    """OpenAI response_format for a file type, or None to leave the output unconstrained"""
+    structured_output = prompts.get("structured_output") or {}
+    mode = structured_output_mode(prompts)
+    if mode == "off":
+        return None
+    if mode == "json_object":
+        return {"type": "json_object"}
+
+    schema = structured_output.get("schema") or derive_schema(prompts.get("required_fields", []))
+    return {
+        "type": "json_schema",
+        "json_schema": {
+            "name": "document_extraction",
+            "schema": schema,
+            "strict": structured_output.get("strict", False),
+        },
+    }
@@ -0,0 +1,119 @@
+import logging
+import re
+from collections import Counter
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+_SPACES = re.compile(r"[ \t\f\v\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_PAGE_NUMBER = re.compile(r"^(page\s*)?\d+(\s*(of|/)\s*\d+)?$", re.IGNORECASE)
+
+_encoding = None
+_encoding_failed = False
+
+def validate_compaction(compaction: Optional[Dict[str, Any]]):
+    """Raise ValueError unless compaction is a valid processing_prompts["compaction"]"""
+    if compaction is None:
+        return
+    if not isinstance(compaction, dict):
+        raise ValueError("compaction must be an object")
+
+    unknown = set(compaction) - {"enabled", "remove_repeated_lines", "max_tokens"}
+    if unknown:
+        raise ValueError(f"Unknown compaction keys: {', '.join(sorted(unknown))}")
+    for key in ("enabled", "remove_repeated_lines"):
+        if not isinstance(compaction.get(key, True), bool):
+            raise ValueError(f"compaction.{key} must be a boolean")
+    max_tokens = compaction.get("max_tokens", 0)
+    if not isinstance(max_tokens, int) or isinstance(max_tokens, bool) or max_tokens < 0:
+        raise ValueError("compaction.max_tokens must be a non-negative integer")
+
+def _get_encoding():
+    """gpt-4o tokenizer, or None when tiktoken can't load it (e.g. no network for the BPE file)"""
+    global _encoding, _encoding_failed
+
+    if _encoding is None and not _encoding_failed:
+        try:
+            import tiktoken
+            _encoding = tiktoken.encoding_for_model(settings.openai_model)
+        except Exception as e:
+            logger.warning(f"tiktoken unavailable, estimating tokens as characters / 4: {e}")
+            _encoding_failed = True
+    return _encoding
+
+def count_tokens(text: str) -> int:
+    encoding = _get_encoding()
+    if encoding is None:
+        return (len(text) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+def truncate_to_tokens(text: str, max_tokens: int) -> str:
+    encoding = _get_encoding()
+    if encoding is None:
+        return text[:max_tokens * 4]
+    tokens = encoding.encode(text, disallowed_special=())
+    return encoding.decode(tokens[:max_tokens]) if len(tokens) > max_tokens else text
+
+def normalize_whitespace(text: str) -> str:
+    lines = [_SPACES.sub(" ", line).strip() for line in text.splitlines()]
+    return _BLANK_LINES.sub("\n\n", "\n".join(lines)).strip()
+
+def remove_repeated_lines(page_texts: List[str]) -> List[str]:
+    """Drop repeats of headers, footers and boilerplate (lines found on at least half of the
+    pages and on compaction_repeat_min_pages or more) and bare page numbers at a page's edges"""
+    page_lines = [page.splitlines() for page in page_texts]
+
+    repeated = set()
+    if len(page_lines) >= settings.compaction_repeat_min_pages:
+        counts = Counter(line for lines in page_lines for line in set(lines) if line)
+        min_pages = max(settings.compaction_repeat_min_pages, (len(page_lines) + 1) // 2)
+        repeated = {line for line, count in counts.items() if count >= min_pages}
+
+    # The first occurrence of a repeated line is kept: headers often carry the
+    # document number or counterparty the extraction prompt asks for
+    seen = set()
+    compacted = []
+    for lines in page_lines:
+        content = [index for index, line in enumerate(lines) if line]
+        edges = {content[0], content[-1]} if content else set()
+        kept = []
+        for index, line in enumerate(lines):
+            if index in edges and _PAGE_NUMBER.match(line):
+                continue
+            if line in repeated:
+                if line in seen:
+                    continue
+                seen.add(line)
+            kept.append(line)
+        compacted.append("\n".join(kept))
+    return compacted
+
+def compact_pages(
+    page_texts: List[str],
+    compaction: Optional[Dict[str, Any]] = None
+) -> Tuple[List[str], str, Dict[str, Any]]:
+    """Compacted pages, the compacted document text and token counts before and after"""
+    compaction = compaction or {}
+    original = "\n".join(page_texts).strip()
+    stats = {"tokens_before": count_tokens(original)}
+
+    if not compaction.get("enabled", settings.text_compaction_enabled):
+        stats["tokens_after"] = stats["tokens_before"]
+        return page_texts, original, stats
+
+    pages = [normalize_whitespace(page) for page in page_texts]
+    if compaction.get("remove_repeated_lines", True):
+        pages = remove_repeated_lines(pages)
+    pages = [page for page in pages if page]
+    text = _BLANK_LINES.sub("\n\n", "\n\n".join(pages)).strip()
+
+    max_tokens = compaction.get("max_tokens", 0)
+    if max_tokens:
+        truncated = truncate_to_tokens(text, max_tokens)
+        stats["truncated"] = truncated != text
+        text = truncated
+
+    stats["tokens_after"] = count_tokens(text)
+    return pages, text, stats
@@ -0,0 +1,318 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+import billiard
+import pymupdf
+from billiard.exceptions import WorkerLostError
+from billiard.pool import Pool
+from typing import Any, Dict, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Bump whenever a change here alters the extracted text
+EXTRACTOR_VERSION = 1
+
+_pool: Optional[Pool] = None
+_pool_pid: Optional[int] = None
+_pool_unavailable = False
+_pool_lock = threading.Lock()
+
+_ocr_pool: Optional[Pool] = None
+_ocr_pool_pid: Optional[int] = None
+_ocr_pool_unavailable = False
+_ocr_unavailable = False
+
+def _open(file_path: Optional[str], file_content: Optional[bytes]) -> pymupdf.Document:
+    # A local path lets MuPDF read the file directly instead of copying it into Python
+    if file_path:
+        return pymupdf.open(file_path, filetype="pdf")
+    return pymupdf.open(stream=file_content, filetype="pdf")
+
+def _extract_range(file_path: Optional[str], file_content: Optional[bytes], start: int, stop: int) -> List[str]:
+    """Text of pages [start, stop); runs in a pool process that opens the document itself"""
+    pdf_document = _open(file_path, file_content)
+    try:
+        return [pdf_document[page_num].get_text() for page_num in range(start, stop)]
+    finally:
+        pdf_document.close()
+
+def _extraction_workers() -> int:
+    return settings.extraction_workers or os.cpu_count() or 1
+
+def _new_pool(processes: int) -> Pool:
+    # billiard (Celery's multiprocessing fork) lets daemonic prefork children start pools;
+    # spawn because forking a process that already runs threads (prefetch, I/O) is unsafe
+    return billiard.get_context("spawn").Pool(processes=processes)
+
+def _get_pool() -> Optional[Pool]:
+    """Lazily started per-process pool; None where child processes can't be created"""
+    global _pool, _pool_pid, _pool_unavailable
+
+    with _pool_lock:
+        if _pool_unavailable:
+            return None
+        if _pool is not None and _pool_pid == os.getpid():
+            return _pool
+
+        _pool = _new_pool(_extraction_workers())
+        _pool_pid = os.getpid()
+        return _pool
+
+def _disable_pool(reason: Exception):
+    global _pool, _pool_unavailable
+
+    with _pool_lock:
+        logger.warning(f"Parallel text extraction unavailable, extracting sequentially: {reason}")
+        if _pool is not None:
+            _pool.terminate()
+        _pool = None
+        # Processes can't be started at all here (e.g. no /dev/shm); a lost worker is retried next time
+        _pool_unavailable = isinstance(reason, (AssertionError, OSError))
+
+def _page_ranges(page_count: int, workers: int) -> List[range]:
+    # A few ranges per worker keeps them all busy when some pages are much heavier
+    size = max(1, -(-page_count // (workers * 4)))
+    return [range(start, min(start + size, page_count)) for start in range(0, page_count, size)]
+
+def validate_page_selection(selection: Optional[Dict[str, Any]]):
+    """Raise ValueError unless selection is a valid processing_prompts["page_selection"]"""
+    if selection is None:
+        return
+    if not isinstance(selection, dict):
+        raise ValueError("page_selection must be an object")
+
+    unknown = set(selection) - {"first_pages", "last_pages", "keywords", "max_keyword_pages"}
+    if unknown:
+        raise ValueError(f"Unknown page_selection keys: {', '.join(sorted(unknown))}")
+    for key in ("first_pages", "last_pages", "max_keyword_pages"):
+        value = selection.get(key, 0)
+        if not isinstance(value, int) or isinstance(value, bool) or value < 0:
+            raise ValueError(f"page_selection.{key} must be a non-negative integer")
+    keywords = selection.get("keywords", [])
+    if not isinstance(keywords, list) or not all(isinstance(k, str) and k for k in keywords):
+        raise ValueError("page_selection.keywords must be a list of non-empty strings")
+    if not (selection.get("first_pages") or selection.get("last_pages") or keywords):
+        raise ValueError("page_selection must select pages by first_pages, last_pages or keywords")
+
+def _max_keyword_pages(selection: Dict[str, Any]) -> int:
+    """Keyword matches after which scanning stops; 0 scans the whole document"""
+    return selection.get("max_keyword_pages", settings.page_selection_max_keyword_pages)
+
+def page_selection_key(selection: Optional[Dict[str, Any]]) -> str:
+    """Stable identifier of a page selection; empty when every page is extracted"""
+    if not selection:
+        return ""
+    if selection.get("keywords"):
+        # The default limit is part of what gets extracted
+        selection = dict(selection, max_keyword_pages=_max_keyword_pages(selection))
+    canonical = json.dumps(selection, sort_keys=True)
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+def _extract_selected(pdf_document: pymupdf.Document, selection: Dict[str, Any]) -> Tuple[List[int], List[str]]:
+    """Text of the first/last N pages plus keyword matches, touching no other pages"""
+    page_count = pdf_document.page_count
+    pages = set(range(min(selection.get("first_pages", 0), page_count)))
+    pages.update(range(max(page_count - selection.get("last_pages", 0), 0), page_count))
+
+    page_texts = {}
+    keywords = [keyword.lower() for keyword in selection.get("keywords", [])]
+    if keywords:
+        max_matches = _max_keyword_pages(selection)
+        matches = 0
+        for page_num in range(page_count):
+            # Stop scanning once enough matching pages were found
+            if max_matches and matches >= max_matches:
+                break
+            text = pdf_document[page_num].get_text()
+            if any(keyword in text.lower() for keyword in keywords):
+                pages.add(page_num)
+                matches += 1
+            if page_num in pages:
+                page_texts[page_num] = text
+
+    page_numbers = sorted(pages)
+    return page_numbers, [
+        page_texts[page_num] if page_num in page_texts else pdf_document[page_num].get_text()
+        for page_num in page_numbers
+    ]
+
+def _image_coverage(page: pymupdf.Page) -> float:
+    """Fraction of the page area covered by images (overlaps counted twice, capped at 1)"""
+    page_area = abs(page.rect)
+    if not page_area:
+        return 0.0
+    covered = sum(abs(pymupdf.Rect(image["bbox"]) & page.rect) for image in page.get_image_info())
+    return min(covered / page_area, 1.0)
+
+def _find_scanned_pages(
+    file_path: Optional[str],
+    file_content: Optional[bytes],
+    page_numbers: List[int],
+    page_texts: List[str]
+) -> List[int]:
+    """Indexes into page_numbers of pages with (almost) no text layer that are mostly image"""
+    candidates = [
+        index for index, text in enumerate(page_texts)
+        if len(text.strip()) < settings.ocr_min_text_chars
+    ]
+    if not candidates:
+        return []
+
+    pdf_document = _open(file_path, file_content)
+    try:
+        return [
+            index for index in candidates
+            if _image_coverage(pdf_document[page_numbers[index]]) >= settings.ocr_min_image_coverage
+        ]
+    finally:
+        pdf_document.close()
+
+def _ocr_page(file_path: Optional[str], file_content: Optional[bytes], page_num: int, language: str, dpi: int) -> str:
+    """OCR one page with Tesseract through PyMuPDF; runs in the OCR pool"""
+    pdf_document = _open(file_path, file_content)
+    try:
+        page = pdf_document[page_num]
+        textpage = page.get_textpage_ocr(language=language, dpi=dpi, full=True)
+        return page.get_text(textpage=textpage)
+    finally:
+        pdf_document.close()
+
+def _get_ocr_pool() -> Optional[Pool]:
+    """OCR is CPU-heavy, so it gets its own small pool bounded by ocr_workers"""
+    global _ocr_pool, _ocr_pool_pid
+
+    with _pool_lock:
+        if _ocr_pool_unavailable or settings.ocr_workers < 1:
+            return None
+        if _ocr_pool is not None and _ocr_pool_pid == os.getpid():
+            return _ocr_pool
+
+        _ocr_pool = _new_pool(settings.ocr_workers)
+        _ocr_pool_pid = os.getpid()
+        return _ocr_pool
+
+def _ocr_pages(
+    file_path: Optional[str],
+    file_content: Optional[bytes],
+    page_numbers: List[int],
+    page_texts: List[str],
+    stats: Optional[Dict[str, Any]]
+) -> List[str]:
+    """Replace the text of scanned pages with OCR output; text-layer pages are left alone"""
+    global _ocr_pool_unavailable, _ocr_unavailable
+
+    scanned = _find_scanned_pages(file_path, file_content, page_numbers, page_texts)
+    if not scanned:
+        return page_texts
+
+    started = time.perf_counter()
+    args = [
+        (file_path, None if file_path else file_content, page_numbers[index], settings.ocr_language, settings.ocr_dpi)
+        for index in scanned
+    ]
+    ocr_texts = None
+    pool = _get_ocr_pool()
+    if pool is not None:
+        try:
+            results = [pool.apply_async(_ocr_page, page_args) for page_args in args]
+            ocr_texts = [result.get() for result in results]
+        except (AssertionError, WorkerLostError, OSError) as e:
+            logger.warning(f"OCR pool unavailable, running OCR in-process: {e}")
+            _ocr_pool_unavailable = isinstance(e, (AssertionError, OSError))
+        except RuntimeError as e:
+            # PyMuPDF raises RuntimeError when Tesseract or its language data is missing
+            logger.warning(f"OCR disabled, Tesseract is not usable: {e}")
+            _ocr_unavailable = True
+            return page_texts
+
+    if ocr_texts is None:
+        try:
+            ocr_texts = [_ocr_page(*page_args) for page_args in args]
+        except RuntimeError as e:
+            logger.warning(f"OCR disabled, Tesseract is not usable: {e}")
+            _ocr_unavailable = True
+            return page_texts
+
+    page_texts = list(page_texts)
+    for index, text in zip(scanned, ocr_texts):
+        page_texts[index] = text
+
+    if stats is not None:
+        stats["ocr_pages"] = stats.get("ocr_pages", 0) + len(scanned)
+        stats["ocr_seconds"] = round(stats.get("ocr_seconds", 0) + time.perf_counter() - started, 3)
+    logger.info(f"OCR'd {len(scanned)} scanned pages in {time.perf_counter() - started:.2f}s")
+    return page_texts
+
+def _extract_text_layer(
+    file_path: Optional[str],
+    file_content: Optional[bytes],
+    page_selection: Optional[Dict[str, Any]]
+) -> Tuple[List[int], List[str]]:
+    pdf_document = _open(file_path, file_content)
+    page_count = pdf_document.page_count
+
+    if page_selection:
+        try:
+            return _extract_selected(pdf_document, page_selection)
+        finally:
+            pdf_document.close()
+
+    threshold = settings.extraction_parallel_min_pages
+    if threshold <= 0 or page_count < threshold or _extraction_workers() < 2:
+        try:
+            return list(range(page_count)), [pdf_document[page_num].get_text() for page_num in range(page_count)]
+        finally:
+            pdf_document.close()
+    pdf_document.close()
+
+    pool = _get_pool()
+    if pool is not None:
+        try:
+            # Each pool process opens the same file (or buffer) and returns its slice
+            results = [
+                pool.apply_async(_extract_range, (file_path, None if file_path else file_content, r.start, r.stop))
+                for r in _page_ranges(page_count, _extraction_workers())
+            ]
+            page_texts = []
+            for result in results:
+                page_texts.extend(result.get())
+            return list(range(page_count)), page_texts
+        except (AssertionError, WorkerLostError, OSError) as e:
+            _disable_pool(e)
+
+    return list(range(page_count)), _extract_range(file_path, file_content, 0, page_count)
+
+def extract_pages(
+    file_path: Optional[str] = None,
+    file_content: Optional[bytes] = None,
+    page_selection: Optional[Dict[str, Any]] = None,
+    stats: Optional[Dict[str, Any]] = None
+) -> List[str]:
+    """Text of every (or every selected) page in order.
+
+    Large documents are split across a process pool; scanned pages without a
+    text layer are OCR'd when enabled, and OCR page count/time go into stats.
+    """
+    page_numbers, page_texts = _extract_text_layer(file_path, file_content, page_selection)
+    if settings.ocr_enabled and not _ocr_unavailable:
+        page_texts = _ocr_pages(file_path, file_content, page_numbers, page_texts, stats)
+    return page_texts
+
+def extraction_variant(page_selection: Optional[Dict[str, Any]]) -> str:
+    """Text-cache variant for the current extraction settings"""
+    variant = page_selection_key(page_selection)
+    return f"{variant}:ocr" if settings.ocr_enabled else variant
+
+def join_pages(page_texts: List[str]) -> str:
+    return "\n".join(page_texts).strip()
+
+def extract_text(
+    file_path: Optional[str] = None,
+    file_content: Optional[bytes] = None,
+    page_selection: Optional[Dict[str, Any]] = None
+) -> str:
+    return join_pages(extract_pages(file_path, file_content, page_selection))
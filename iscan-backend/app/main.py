@@ -4,6 +4,7 @@ from app.api.v1 import files, file_types, batches, tasks
 from app.core.config import settings
 from app.core.database import engine
 from app.models import Base
+from app.services.io_executor import io_executor
 
 Base.metadata.create_all(bind=engine)
 
@@ -26,6 +27,10 @@ app.include_router(file_types.router, prefix="/api/v1/file-types", tags=["file-t
 app.include_router(batches.router, prefix="/api/v1/batches", tags=["batches"])
 app.include_router(tasks.router, prefix="/api/v1/tasks", tags=["tasks"])
 
+@app.on_event("shutdown")
+def shutdown_io_executor():
+    io_executor.shutdown()
+
 @app.get("/")
 def read_root():
     return {"message": "iScan Document Processing API"}
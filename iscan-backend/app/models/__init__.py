@@ -2,6 +2,8 @@ from .file_type import FileType
 from .file import File
 from .batch import Batch
 from .processing_result import ProcessingResult
+from .extracted_text import ExtractedText
+from .provider_batch import ProviderBatch
 from app.core.database import Base
 
-__all__ = ["FileType", "File", "Batch", "ProcessingResult", "Base"]
\ No newline at end of file
+__all__ = ["FileType", "File", "Batch", "ProcessingResult", "ExtractedText", "ProviderBatch", "Base"]
\ No newline at end of file
@@ -20,4 +20,6 @@ class Batch(Base):
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     completed_at = Column(DateTime(timezone=True), nullable=True)
     
-    processing_results = relationship("ProcessingResult", back_populates="batch")
\ No newline at end of file
+    processing_results = relationship("ProcessingResult", back_populates="batch")
+    # Offline submissions through the provider's batch API
+    provider_batches = relationship("ProviderBatch", back_populates="batch")
\ No newline at end of file
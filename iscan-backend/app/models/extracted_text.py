@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, DateTime, LargeBinary, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ExtractedText(Base):
+    __tablename__ = "extracted_texts"
+    __table_args__ = (
+        UniqueConstraint("content_hash", "extractor_version", "variant", name="uq_extracted_text_key"),
+    )
+    
+    id = Column(Integer, primary_key=True, index=True)
+    content_hash = Column(String(64), nullable=False)
+    extractor_version = Column(Integer, nullable=False)
+    # Distinguishes extractions of the same document that keep different pages
+    variant = Column(String(255), nullable=False, default="")
+    # zlib-compressed JSON list of page texts
+    pages_data = Column(LargeBinary, nullable=False)
+    page_count = Column(Integer, nullable=False)
+    text_bytes = Column(Integer, nullable=False)
+    stored_bytes = Column(Integer, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    last_used_at = Column(DateTime(timezone=True), server_default=func.now(), index=True)
@@ -19,6 +19,7 @@ class File(Base):
     unique_name = Column(String(255), nullable=False, unique=True, index=True)
     file_type_id = Column(Integer, ForeignKey("file_types.id"), nullable=False)
     ftp_path = Column(String(500), nullable=False)
+    content_hash = Column(String(64), nullable=True, index=True)
     status = Column(Enum(FileStatus), default=FileStatus.UPLOADED)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
@@ -9,5 +9,6 @@ class FileType(Base):
     name = Column(String(100), unique=True, nullable=False, index=True)
     description = Column(Text)
     processing_prompts = Column(JSON, nullable=False)
+    prompt_version = Column(Integer, nullable=False, default=1)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
\ No newline at end of file
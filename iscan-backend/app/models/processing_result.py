@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Text
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON, Text, Boolean
 from sqlalchemy.sql import func
 from sqlalchemy.orm import relationship
 from app.core.database import Base
@@ -12,6 +12,10 @@ class ProcessingResult(Base):
     result_data = Column(JSON, nullable=False)
     csv_path = Column(String(500), nullable=True)
     error_message = Column(Text, nullable=True)
+    prompt_version = Column(Integer, nullable=True)
+    processing_metrics = Column(JSON, nullable=True)
+    model_used = Column(String(100), nullable=True)
+    escalated = Column(Boolean, default=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     
     file = relationship("File", back_populates="processing_results")
@@ -0,0 +1,18 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, DateTime, JSON
+from sqlalchemy.sql import func
+from sqlalchemy.orm import relationship
+from app.core.database import Base
+
+# One submission of a batch's files to the provider's batch API; a batch can have several
+class ProviderBatch(Base):
+    __tablename__ = "provider_batches"
+    
+    id = Column(Integer, primary_key=True, index=True)
+    batch_id = Column(Integer, ForeignKey("batches.id"), nullable=False, index=True)
+    provider_batch_id = Column(String(100), nullable=False, unique=True, index=True)
+    status = Column(String(50), nullable=False)
+    file_ids = Column(JSON, nullable=False)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+    
+    batch = relationship("Batch", back_populates="provider_batches")
\ No newline at end of file
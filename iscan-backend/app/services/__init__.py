@@ -1,4 +1,6 @@
+from .base_storage import BaseStorage
 from .ftp_service import FTPService
+from .local_storage_service import LocalStorageService
 from .queue_service import QueueService
 
-__all__ = ["FTPService", "QueueService"]
\ No newline at end of file
+__all__ = ["BaseStorage", "FTPService", "LocalStorageService", "QueueService"]
\ No newline at end of file
@@ -0,0 +1,132 @@
+import hashlib
+import io
+import logging
+from abc import ABC, abstractmethod
+from typing import BinaryIO, List, Optional, Tuple
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class BaseStorage(ABC):
+    """Where uploaded PDFs and exported CSV/JSON files live.
+
+    Paths are '/'-separated and rooted at the configured base path, the same
+    values stored in File.ftp_path, whichever backend holds the bytes.
+    """
+
+    def __init__(self):
+        self.base_path = settings.ftp_base_path
+        self.files_path = settings.ftp_files_path
+        self.csv_path = settings.ftp_csv_path
+        self.chunk_size = settings.upload_chunk_size
+        self.shard_levels = settings.ftp_shard_levels
+        self.shard_width = settings.ftp_shard_width
+
+    @abstractmethod
+    def upload_stream(self, fileobj: BinaryIO, remote_path: str) -> bool:
+        pass
+
+    @abstractmethod
+    def download_to(self, remote_path: str, fileobj: BinaryIO) -> bool:
+        """Stream a stored file into a writable file object"""
+        pass
+
+    @abstractmethod
+    def file_exists(self, remote_path: str) -> bool:
+        pass
+
+    @abstractmethod
+    def delete_file(self, remote_path: str) -> bool:
+        pass
+
+    @abstractmethod
+    def rename_file(self, from_path: str, to_path: str) -> bool:
+        pass
+
+    def local_path(self, remote_path: str) -> Optional[str]:
+        """Filesystem path of a stored file when the backend is local, for zero-copy reads"""
+        return None
+
+    def ensure_base_directories(self) -> bool:
+        return True
+
+    def upload_file(self, file_content: bytes, remote_path: str) -> bool:
+        logger.info(f"Uploading file ({len(file_content)} bytes)")
+        return self.upload_stream(io.BytesIO(file_content), remote_path)
+
+    def download_file(self, remote_path: str) -> Optional[bytes]:
+        bio = io.BytesIO()
+        if not self.download_to(remote_path, bio):
+            return None
+        return bio.getvalue()
+
+    def pdf_path(self, filename: str) -> str:
+        """Sharded location of a PDF, e.g. files/ab/cd/<filename> for two levels of two hex chars"""
+        digest = hashlib.md5(filename.encode('utf-8')).hexdigest()
+        shards = [
+            digest[level * self.shard_width:(level + 1) * self.shard_width]
+            for level in range(self.shard_levels)
+        ]
+        return '/'.join([self.files_path, *shards, filename])
+
+    def upload_pdf_file(self, file_content: bytes, filename: str) -> Optional[str]:
+        """Upload PDF file to the files directory"""
+        return self.upload_pdf_stream(io.BytesIO(file_content), filename)
+
+    def upload_pdf_stream(self, fileobj: BinaryIO, filename: str) -> Optional[str]:
+        """Stream a PDF file object to the files directory"""
+        try:
+            remote_path = self.pdf_path(filename)
+            logger.info(f"Uploading PDF: {filename} to {remote_path}")
+            if self.upload_stream(fileobj, remote_path):
+                return remote_path
+            logger.error(f"PDF upload failed for: {filename}")
+            return None
+        except Exception as e:
+            logger.error(f"PDF upload error for {filename}: {e}")
+            return None
+
+    def upload_pdf_streams(self, uploads: List[Tuple[BinaryIO, str]]) -> List[str]:
+        """Stream several PDFs to the files directory; if any fails, the others are removed and it raises"""
+        remote_paths = []
+        try:
+            for fileobj, filename in uploads:
+                remote_path = self.upload_pdf_stream(fileobj, filename)
+                if not remote_path:
+                    raise IOError(f"Failed to store {filename}")
+                remote_paths.append(remote_path)
+        except BaseException:
+            self.delete_files(remote_paths)
+            raise
+        return remote_paths
+
+    def delete_files(self, remote_paths: List[str]):
+        """Best-effort removal of files stored by a failed multi-file upload"""
+        for remote_path in remote_paths:
+            if not self.delete_file(remote_path):
+                logger.warning(f"Could not remove {remote_path} after a failed upload")
+
+    def upload_csv_file(self, csv_content: bytes, filename: str) -> Optional[str]:
+        """Upload CSV file to the csv directory"""
+        try:
+            remote_path = f"{self.csv_path}/{filename}"
+            if self.upload_file(csv_content, remote_path):
+                return remote_path
+            return None
+        except Exception as e:
+            print(f"CSV upload error: {e}")
+            return None
+
+    def upload_json_file(self, json_content: bytes, filename: str) -> Optional[str]:
+        """Upload JSON file to the csv directory (reusing same directory)"""
+        try:
+            remote_path = f"{self.csv_path}/{filename}"
+            logger.info(f"Uploading JSON: {filename} to {remote_path}")
+            if self.upload_file(json_content, remote_path):
+                logger.info(f"JSON upload successful: {remote_path}")
+                return remote_path
+            logger.error(f"JSON upload failed for: {filename}")
+            return None
+        except Exception as e:
+            logger.error(f"JSON upload error for {filename}: {e}")
+            return None
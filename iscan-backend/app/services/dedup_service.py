@@ -0,0 +1,73 @@
+import hashlib
+import logging
+from typing import BinaryIO, Dict, Iterable, Optional
+from sqlalchemy.orm import Session
+from app.models import File, FileType, ProcessingResult
+
+logger = logging.getLogger(__name__)
+
+class HashingReader:
+    """File-like wrapper that feeds every chunk read through SHA-256"""
+
+    def __init__(self, fileobj: BinaryIO):
+        self._fileobj = fileobj
+        self._sha256 = hashlib.sha256()
+
+    def read(self, size: int = -1) -> bytes:
+        chunk = self._fileobj.read(size)
+        self._sha256.update(chunk)
+        return chunk
+
+    def hexdigest(self) -> str:
+        return self._sha256.hexdigest()
+
+class DedupService:
+    """Reuse processing results of byte-identical uploads of the same file type"""
+
+    def find_reusable_results(
+        self,
+        db: Session,
+        content_hashes: Iterable[str],
+        file_type: FileType
+    ) -> Dict[str, ProcessingResult]:
+        """Latest successful result per content hash, produced by the current prompt version"""
+        hashes = set(content_hashes)
+        if not hashes:
+            return {}
+
+        rows = db.query(File.content_hash, ProcessingResult).join(
+            ProcessingResult, File.id == ProcessingResult.file_id
+        ).filter(
+            File.content_hash.in_(hashes),
+            File.file_type_id == file_type.id,
+            ProcessingResult.prompt_version == file_type.prompt_version,
+            ProcessingResult.error_message.is_(None)
+        ).order_by(ProcessingResult.id.desc()).all()
+
+        reusable = {}
+        for content_hash, result in rows:
+            if content_hash in reusable:
+                continue
+            if not result.result_data or "parsing_error" in result.result_data:
+                continue
+            reusable[content_hash] = result
+        return reusable
+
+    def find_reusable_result(self, db: Session, content_hash: str, file_type: FileType) -> Optional[ProcessingResult]:
+        return self.find_reusable_results(db, [content_hash], file_type).get(content_hash)
+
+    def reuse_result(self, db: Session, file_id: int, source: ProcessingResult, batch_id: Optional[int]) -> ProcessingResult:
+        """Copy a prior result onto a new file (caller marks the file completed and commits)"""
+        logger.info(f"Reusing result {source.id} of file {source.file_id} for file {file_id}")
+        processing_result = ProcessingResult(
+            file_id=file_id,
+            batch_id=batch_id,
+            result_data=dict(source.result_data),
+            prompt_version=source.prompt_version,
+            model_used=source.model_used,
+            escalated=source.escalated
+        )
+        db.add(processing_result)
+        return processing_result
+
+dedup_service = DedupService()
@@ -0,0 +1,159 @@
+import fcntl
+import hashlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from typing import BinaryIO, Callable, Iterator, Optional
+from app.core.config import settings
+from app.services.base_storage import BaseStorage
+from app.services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
+
+class DocumentCache:
+    """Size-capped LRU cache of downloaded documents on local disk.
+
+    Shared by all worker processes on a host: entries are written to a temp
+    file and renamed into place and hits refresh the file's mtime. Each process
+    checks the size cap every evict_interval seconds, one process at a time
+    under an flock, and never removes a file used within the last evict_grace
+    seconds, so a path just returned by get() stays valid while it is read.
+    """
+
+    def __init__(self, directory: str, max_bytes: int, evict_interval: float = 60, evict_grace: float = 300):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.evict_interval = evict_interval
+        self.evict_grace = evict_grace
+        self._last_evict = 0.0
+        self._evict_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _path(self, key: str) -> str:
+        digest = hashlib.sha256(key.encode('utf-8')).hexdigest()
+        return os.path.join(self.directory, digest[:2], f"{digest}.pdf")
+
+    def get(self, key: str) -> Optional[str]:
+        """Path of the cached document, or None on a miss"""
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            metrics_service.incr("document_cache", "misses")
+            return None
+
+        metrics_service.incr("document_cache", "hits")
+        return path
+
+    def put_stream(self, key: str, write: Callable[[BinaryIO], bool]) -> Optional[str]:
+        """Let write() stream a document into a temp file, then move it into place.
+
+        Returns the cached path, or None if the cache is disabled or write() failed.
+        """
+        if not self.enabled:
+            return None
+
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                written = write(f)
+            if not written:
+                os.unlink(tmp_path)
+                return None
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+
+        with self._evict_lock:
+            due = time.monotonic() - self._last_evict >= self.evict_interval
+            if due:
+                self._last_evict = time.monotonic()
+        if due:
+            self.evict()
+        return path
+
+    @contextmanager
+    def local_document(self, storage: BaseStorage, remote_path: str, key: str) -> Iterator[str]:
+        """Yield a local path for a stored document without ever holding it in memory.
+
+        Local storage is read in place. Otherwise the document is served from the
+        cache, streamed into it on a miss, or, with the cache disabled, streamed
+        into a temp file that is removed on exit.
+        """
+        path = storage.local_path(remote_path) or self.get(key)
+        if path is None and self.enabled:
+            path = self.put_stream(key, lambda f: storage.download_to(remote_path, f))
+            if path is None:
+                raise IOError(f"Could not download file from storage: {remote_path}")
+
+        if path is not None:
+            yield path
+            return
+
+        with tempfile.NamedTemporaryFile(suffix=".pdf") as tmp:
+            if not storage.download_to(remote_path, tmp):
+                raise IOError(f"Could not download file from storage: {remote_path}")
+            tmp.flush()
+            yield tmp.name
+
+    def evict(self):
+        """Remove least recently used documents until the cache fits in max_bytes"""
+        os.makedirs(self.directory, exist_ok=True)
+        with open(os.path.join(self.directory, ".lock"), "w") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                # Another process is already evicting
+                return
+
+            entries = []
+            total = 0
+            for root, _, files in os.walk(self.directory):
+                for name in files:
+                    if not name.endswith(".pdf"):
+                        continue
+                    path = os.path.join(root, name)
+                    try:
+                        stat = os.stat(path)
+                    except FileNotFoundError:
+                        continue
+                    entries.append((stat.st_mtime, stat.st_size, path))
+                    total += stat.st_size
+
+            if total <= self.max_bytes:
+                return
+
+            entries.sort()
+            recently_used = time.time() - self.evict_grace
+            evicted = 0
+            for mtime, size, path in entries:
+                if total <= self.max_bytes or mtime >= recently_used:
+                    break
+                try:
+                    os.unlink(path)
+                    total -= size
+                    evicted += 1
+                except FileNotFoundError:
+                    continue
+            if evicted:
+                metrics_service.incr("document_cache", "evictions", evicted)
+                logger.info(f"Document cache evicted {evicted} documents down to {total} bytes")
+
+document_cache = DocumentCache(
+    settings.document_cache_dir,
+    settings.document_cache_max_bytes,
+    settings.document_cache_evict_interval,
+    settings.document_cache_evict_grace
+)
@@ -1,79 +1,195 @@
 import ftplib
-import io
 import os
+import time
 import logging
-from typing import Optional, BinaryIO
+import threading
+from collections import deque
+from typing import Callable, List, BinaryIO, Tuple
 from contextlib import contextmanager
 from app.core.config import settings
+from app.services.base_storage import BaseStorage
 
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-class FTPService:
+# Reply codes servers use when a STOR target directory does not exist
+MISSING_PATH_CODES = ('550', '553')
+
+class CountingFTP(ftplib.FTP):
+    """FTP session that counts control-channel commands so round trips can be logged"""
+    
+    command_count = 0
+    
+    def putcmd(self, line):
+        self.command_count += 1
+        super().putcmd(line)
+
+class FTPConnectionPool:
+    """Thread-safe pool of logged-in FTP sessions shared by every caller in a process"""
+    
+    def __init__(self, connect: Callable[[], ftplib.FTP], max_size: int, idle_timeout: float, health_check_interval: float):
+        self._connect = connect
+        self.max_size = max_size
+        self.idle_timeout = idle_timeout
+        self.health_check_interval = health_check_interval
+        self._reset()
+    
+    def _reset(self):
+        # Sessions inherited across a fork belong to the parent; start over in the child
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.max_size)
+        self._idle = deque()
+    
+    def acquire(self) -> ftplib.FTP:
+        if self._pid != os.getpid():
+            self._reset()
+        
+        self._slots.acquire()
+        try:
+            while True:
+                self.evict_idle()
+                with self._lock:
+                    entry = self._idle.pop() if self._idle else None
+                if entry is None:
+                    return self._connect()
+                
+                ftp, last_used = entry
+                if time.monotonic() - last_used < self.health_check_interval or self._is_alive(ftp):
+                    return ftp
+                logger.info("Pooled FTP connection failed health check, reconnecting")
+                self._close(ftp)
+        except Exception:
+            self._slots.release()
+            raise
+    
+    def release(self, ftp: ftplib.FTP, discard: bool = False):
+        if self._pid != os.getpid():
+            return
+        
+        if discard:
+            self._close(ftp)
+        else:
+            with self._lock:
+                self._idle.append((ftp, time.monotonic()))
+        self._slots.release()
+    
+    def evict_idle(self):
+        """Close sessions that sat unused longer than idle_timeout"""
+        expired = []
+        now = time.monotonic()
+        with self._lock:
+            while self._idle and now - self._idle[0][1] > self.idle_timeout:
+                expired.append(self._idle.popleft()[0])
+        for ftp in expired:
+            logger.info("Evicting idle FTP connection")
+            self._close(ftp)
+    
+    def close_all(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for ftp, _ in idle:
+            self._close(ftp)
+    
+    def _is_alive(self, ftp: ftplib.FTP) -> bool:
+        try:
+            ftp.voidcmd('NOOP')
+            return True
+        except ftplib.all_errors:
+            return False
+    
+    def _close(self, ftp: ftplib.FTP):
+        try:
+            ftp.quit()
+        except:
+            ftp.close()
+
+class FTPService(BaseStorage):
     def __init__(self):
+        super().__init__()
         self.host = settings.ftp_host
         self.port = settings.ftp_port
         self.username = settings.ftp_user
         self.password = settings.ftp_password
-        self.base_path = settings.ftp_base_path
-        self.files_path = settings.ftp_files_path
-        self.csv_path = settings.ftp_csv_path
+        self.timeout = settings.ftp_timeout
+        self._known_directories = set()
+        self._directories_lock = threading.Lock()
+        self._pool = None
+        if settings.ftp_pool_size > 0:
+            self._pool = FTPConnectionPool(
+                self._connect,
+                max_size=settings.ftp_pool_size,
+                idle_timeout=settings.ftp_pool_idle_timeout,
+                health_check_interval=settings.ftp_pool_health_check_interval
+            )
     
-    @contextmanager
-    def get_connection(self):
-        ftp = ftplib.FTP()
+    def _connect(self) -> ftplib.FTP:
+        ftp = CountingFTP(timeout=self.timeout)
         try:
             logger.info(f"Connecting to FTP server: {self.host}:{self.port}")
             ftp.connect(self.host, self.port)
             logger.info(f"Logging in with user: {self.username}")
             ftp.login(self.username, self.password)
             logger.info("FTP connection successful")
+            return ftp
+        except Exception:
+            ftp.close()
+            raise
+    
+    @contextmanager
+    def get_connection(self):
+        """Borrow a pooled FTP session, or open a one-off session when pooling is disabled"""
+        ftp = None
+        discard = False
+        try:
+            ftp = self._pool.acquire() if self._pool else self._connect()
             yield ftp
         except ftplib.error_perm as e:
+            # Permission errors are command-level replies; the session is still usable
             logger.error(f"FTP permission error: {e}")
             raise
         except ftplib.error_temp as e:
             logger.error(f"FTP temporary error: {e}")
+            discard = True
             raise
         except Exception as e:
             logger.error(f"FTP connection error: {e}")
+            discard = True
             raise
         finally:
-            try:
-                ftp.quit()
-                logger.info("FTP connection closed")
-            except:
-                ftp.close()
-                logger.info("FTP connection forcibly closed")
+            if ftp is not None:
+                if self._pool:
+                    self._pool.release(ftp, discard=discard)
+                else:
+                    try:
+                        ftp.quit()
+                        logger.info("FTP connection closed")
+                    except:
+                        ftp.close()
+                        logger.info("FTP connection forcibly closed")
     
-    def upload_file(self, file_content: bytes, remote_path: str) -> bool:
+    def upload_stream(self, fileobj: BinaryIO, remote_path: str) -> bool:
+        """Upload from a file object in chunk_size blocks so memory stays flat"""
         try:
             logger.info(f"Starting upload to: {remote_path}")
             with self.get_connection() as ftp:
-                directory = os.path.dirname(remote_path)
-                if directory:
-                    logger.info(f"Ensuring directory exists: {directory}")
-                    self._ensure_directory_exists(ftp, directory)
-                
-                logger.info(f"Uploading file ({len(file_content)} bytes)")
-                bio = io.BytesIO(file_content)
-                ftp.storbinary(f'STOR {remote_path}', bio)
-                logger.info(f"Upload successful: {remote_path}")
+                commands_before = ftp.command_count
+                self._store(ftp, fileobj, remote_path)
+                logger.info(f"Upload successful: {remote_path} ({ftp.command_count - commands_before} FTP round trips)")
                 return True
         except Exception as e:
             logger.error(f"FTP upload error for {remote_path}: {e}")
             return False
     
-    def download_file(self, remote_path: str) -> Optional[bytes]:
+    def download_to(self, remote_path: str, fileobj: BinaryIO) -> bool:
         try:
             with self.get_connection() as ftp:
-                bio = io.BytesIO()
-                ftp.retrbinary(f'RETR {remote_path}', bio.write)
-                return bio.getvalue()
+                ftp.retrbinary(f'RETR {remote_path}', fileobj.write, blocksize=self.chunk_size)
+                return True
         except Exception as e:
             print(f"FTP download error: {e}")
-            return None
+            return False
     
     def delete_file(self, remote_path: str) -> bool:
         try:
@@ -84,54 +200,56 @@ class FTPService:
             print(f"FTP delete error: {e}")
             return False
     
+    def rename_file(self, from_path: str, to_path: str) -> bool:
+        """Server-side move, creating the target directory if needed"""
+        try:
+            with self.get_connection() as ftp:
+                directory = os.path.dirname(to_path)
+                if directory:
+                    self._ensure_directory_exists(ftp, directory)
+                ftp.rename(from_path, to_path)
+                return True
+        except Exception as e:
+            logger.error(f"FTP rename error {from_path} -> {to_path}: {e}")
+            return False
+    
     def file_exists(self, remote_path: str) -> bool:
         try:
             with self.get_connection() as ftp:
+                # SIZE is only well-defined in binary mode and pooled sessions keep their TYPE
+                ftp.voidcmd('TYPE I')
                 ftp.size(remote_path)
                 return True
         except:
             return False
     
-    def upload_pdf_file(self, file_content: bytes, filename: str) -> Optional[str]:
-        """Upload PDF file to the files directory"""
-        try:
-            remote_path = f"{self.files_path}/{filename}"
-            logger.info(f"Uploading PDF: {filename} to {remote_path}")
-            if self.upload_file(file_content, remote_path):
-                return remote_path
-            logger.error(f"PDF upload failed for: {filename}")
-            return None
-        except Exception as e:
-            logger.error(f"PDF upload error for {filename}: {e}")
-            return None
-    
-    def upload_csv_file(self, csv_content: bytes, filename: str) -> Optional[str]:
-        """Upload CSV file to the csv directory"""
-        try:
-            remote_path = f"{self.csv_path}/{filename}"
-            if self.upload_file(csv_content, remote_path):
-                return remote_path
-            return None
-        except Exception as e:
-            print(f"CSV upload error: {e}")
-            return None
-    
-    def upload_json_file(self, json_content: bytes, filename: str) -> Optional[str]:
-        """Upload JSON file to the csv directory (reusing same directory)"""
+    def upload_pdf_streams(self, uploads: List[Tuple[BinaryIO, str]]) -> List[str]:
+        """Stream several PDFs to the files directory over a single FTP session.
+
+        If any upload fails, the files already stored (and the partial one) are removed before raising.
+        """
+        remote_paths = []
         try:
-            remote_path = f"{self.csv_path}/{filename}"
-            logger.info(f"Uploading JSON: {filename} to {remote_path}")
-            if self.upload_file(json_content, remote_path):
-                logger.info(f"JSON upload successful: {remote_path}")
-                return remote_path
-            logger.error(f"JSON upload failed for: {filename}")
-            return None
-        except Exception as e:
-            logger.error(f"JSON upload error for {filename}: {e}")
-            return None
+            with self.get_connection() as ftp:
+                commands_before = ftp.command_count
+                for fileobj, filename in uploads:
+                    remote_path = self.pdf_path(filename)
+                    logger.info(f"Uploading PDF: {filename} to {remote_path}")
+                    remote_paths.append(remote_path)
+                    self._store(ftp, fileobj, remote_path)
+                round_trips = ftp.command_count - commands_before
+        except BaseException:
+            self.delete_files(remote_paths)
+            raise
+        logger.info(f"Uploaded {len(remote_paths)} PDFs in one session ({round_trips} FTP round trips)")
+        return remote_paths
     
     def ensure_base_directories(self) -> bool:
         """Ensure the base directories exist on FTP server"""
+        directories = (self.base_path, self.files_path, self.csv_path)
+        if all(self._is_known_directory(directory) for directory in directories):
+            return True
+        
         try:
             with self.get_connection() as ftp:
                 self._ensure_directory_exists(ftp, self.base_path)
@@ -142,24 +260,60 @@ class FTPService:
             print(f"Directory creation error: {e}")
             return False
     
+    def _store(self, ftp: ftplib.FTP, fileobj: BinaryIO, remote_path: str):
+        """STOR into a cached directory, re-creating it once if the server reports it missing"""
+        directory = os.path.dirname(remote_path)
+        if directory:
+            self._ensure_directory_exists(ftp, directory)
+        
+        try:
+            ftp.storbinary(f'STOR {remote_path}', fileobj, blocksize=self.chunk_size)
+        except ftplib.error_perm as e:
+            # The reply arrives before any data is read, so fileobj can be sent again
+            if not directory or not str(e).startswith(MISSING_PATH_CODES):
+                raise
+            logger.warning(f"STOR {remote_path} failed ({e}); invalidating cached directory {directory}")
+            self._forget_directory(directory)
+            self._ensure_directory_exists(ftp, directory)
+            ftp.storbinary(f'STOR {remote_path}', fileobj, blocksize=self.chunk_size)
+    
+    def _is_known_directory(self, directory: str) -> bool:
+        with self._directories_lock:
+            return directory.rstrip('/') in self._known_directories
+    
+    def _forget_directory(self, directory: str):
+        """Drop a directory and its ancestors from the known-directory cache"""
+        with self._directories_lock:
+            path = directory.rstrip('/')
+            while path:
+                self._known_directories.discard(path)
+                path = os.path.dirname(path).rstrip('/')
+    
     def _ensure_directory_exists(self, ftp: ftplib.FTP, directory: str):
-        parts = directory.split('/')
+        if self._is_known_directory(directory):
+            return
+        
+        absolute = directory.startswith('/')
         current_path = ''
         
-        for part in parts:
+        for part in directory.split('/'):
             if not part:
                 continue
             
-            current_path += f'/{part}' if current_path else part
+            current_path = f'{current_path}/{part}' if current_path or absolute else part
+            if self._is_known_directory(current_path):
+                continue
             
             try:
                 ftp.cwd(current_path)
             except ftplib.error_perm:
                 try:
                     ftp.mkd(current_path)
-                    ftp.cwd(current_path)
                 except ftplib.error_perm:
-                    pass
+                    continue
+            
+            with self._directories_lock:
+                self._known_directories.add(current_path)
         
         ftp.cwd('/')
 
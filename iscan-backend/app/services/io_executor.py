@@ -0,0 +1,29 @@
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class IOExecutor:
+    """Bounded thread pool for blocking storage I/O called from async endpoints"""
+
+    def __init__(self, max_workers: int):
+        self.max_workers = max_workers
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_workers,
+            thread_name_prefix="storage-io"
+        )
+
+    async def run(self, func: Callable[..., Any], *args, **kwargs) -> Any:
+        """Run a blocking callable on the pool without blocking the event loop"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, partial(func, *args, **kwargs))
+
+    def shutdown(self):
+        logger.info("Shutting down storage I/O executor")
+        self._executor.shutdown(wait=True)
+
+io_executor = IOExecutor(settings.storage_io_workers)
@@ -0,0 +1,77 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import redis
+from typing import Any, Optional
+from app.core.config import settings
+from app.services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
+
+class LLMCacheService:
+    """Redis cache of LLM responses keyed by everything that determines them.
+
+    At temperature 0 the same model, prompts and document text give the same
+    answer, so reruns (a batch retried after a worker crash, reprocessing
+    unchanged documents) skip the call. Entries expire after a TTL and a
+    sorted-set index by insertion time caps their number.
+    """
+
+    PREFIX = "iscan:llm_cache:"
+    INDEX_KEY = "iscan:llm_cache_index"
+
+    def __init__(self):
+        self.ttl = settings.llm_cache_ttl
+        self.max_entries = settings.llm_cache_max_entries
+        self.redis_client = redis.from_url(settings.redis_url)
+
+    @property
+    def enabled(self) -> bool:
+        return self.ttl > 0 and self.max_entries > 0
+
+    def make_key(self, model: str, system_prompt: str, extraction_prompt: str, text: str, **params: Any) -> str:
+        """Hash of the request; params covers anything else sent (e.g. a response schema)"""
+        payload = json.dumps([model, system_prompt, extraction_prompt, text, params], sort_keys=True)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[str]:
+        if not self.enabled:
+            return None
+        # A cache outage must never fail processing, it only costs an LLM call
+        try:
+            content = self.redis_client.get(f"{self.PREFIX}{key}")
+        except redis.RedisError as e:
+            logger.warning(f"LLM cache read failed: {e}")
+            return None
+
+        metrics_service.incr("llm_cache", "hits" if content is not None else "misses")
+        return content.decode("utf-8") if content is not None else None
+
+    def put(self, key: str, content: str):
+        if not self.enabled:
+            return
+        try:
+            pipe = self.redis_client.pipeline()
+            pipe.set(f"{self.PREFIX}{key}", content, ex=self.ttl)
+            pipe.zadd(self.INDEX_KEY, {key: time.time()})
+            pipe.zcard(self.INDEX_KEY)
+            size = pipe.execute()[-1]
+
+            if size > self.max_entries:
+                evicted = self.redis_client.zpopmin(self.INDEX_KEY, size - self.max_entries)
+                if evicted:
+                    self.redis_client.delete(*(f"{self.PREFIX}{member.decode()}" for member, _ in evicted))
+                    metrics_service.incr("llm_cache", "evictions", len(evicted))
+        except redis.RedisError as e:
+            logger.warning(f"LLM cache write failed: {e}")
+
+    # Coroutine variants for the shared event loop, which must not wait on Redis
+    async def aget(self, key: str) -> Optional[str]:
+        return await asyncio.to_thread(self.get, key)
+
+    async def aput(self, key: str, content: str):
+        await asyncio.to_thread(self.put, key, content)
+
+llm_cache_service = LLMCacheService()
@@ -0,0 +1,131 @@
+import asyncio
+import logging
+import random
+import time
+import weakref
+import httpx
+import openai
+from email.utils import parsedate_to_datetime
+from typing import Any, Dict, List, Optional
+from langchain_core.messages import BaseMessage
+from langchain_openai import ChatOpenAI
+from app.core.config import settings
+from app.services.rate_limiter import rate_limiter
+
+logger = logging.getLogger(__name__)
+
+def retry_after_seconds(value: Optional[str]) -> Optional[float]:
+    """Retry-After as seconds, from either delay-seconds or an HTTP-date; None if absent or malformed"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        logger.warning(f"Ignoring malformed Retry-After header: {value!r}")
+        return None
+
+def backoff(attempt: int) -> float:
+    return min(2 ** attempt, 30) * random.uniform(0.5, 1.5)
+
+class LLMClient:
+    """Process-wide ChatOpenAI instances sharing one pooled async HTTP client per event loop.
+
+    httpx connections are bound to the loop that opened them, so clients are
+    cached per running loop; with the worker's persistent loop that means one
+    client, and keep-alive connections, for the life of the process.
+    """
+
+    def __init__(self):
+        self._clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, ChatOpenAI]]" = (
+            weakref.WeakKeyDictionary()
+        )
+        self._http_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = (
+            weakref.WeakKeyDictionary()
+        )
+
+    def _http_client(self, loop: asyncio.AbstractEventLoop) -> httpx.AsyncClient:
+        http_client = self._http_clients.get(loop)
+        if http_client is None:
+            http_client = httpx.AsyncClient(
+                timeout=httpx.Timeout(settings.openai_timeout, connect=settings.openai_connect_timeout),
+                limits=httpx.Limits(
+                    max_connections=settings.openai_max_connections,
+                    max_keepalive_connections=settings.openai_max_connections
+                )
+            )
+            self._http_clients[loop] = http_client
+        return http_client
+
+    def get(self, model: Optional[str] = None) -> ChatOpenAI:
+        """ChatOpenAI for model bound to the running loop's pooled HTTP client"""
+        loop = asyncio.get_running_loop()
+        model = model or settings.openai_model
+        clients = self._clients.setdefault(loop, {})
+
+        llm = clients.get(model)
+        if llm is None:
+            llm = ChatOpenAI(
+                model=model,
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                temperature=0,
+                timeout=settings.openai_timeout,
+                # With the shared limiter, retries happen in ainvoke() where 429s feed back into it
+                max_retries=0 if rate_limiter.enabled else settings.openai_max_retries,
+                http_async_client=self._http_client(loop)
+            )
+            clients[model] = llm
+            logger.info(f"Created shared LLM client for {model}")
+        return llm
+
+    async def ainvoke(
+        self,
+        messages: List[BaseMessage],
+        estimated_tokens: int,
+        model: Optional[str] = None,
+        **kwargs: Any
+    ):
+        """Send a chat request once the cluster-wide rate limiter has capacity for it.
+
+        kwargs (e.g. response_format) are passed through to the completions request.
+        """
+        llm = self.get(model)
+        attempt = 0
+        while True:
+            await rate_limiter.acquire(estimated_tokens)
+            try:
+                response = await llm.ainvoke(messages, **kwargs)
+            except openai.RateLimitError as e:
+                if not rate_limiter.enabled:
+                    raise
+                retry_after = retry_after_seconds(e.response.headers.get("retry-after"))
+                await rate_limiter.on_rate_limited(retry_after)
+                if attempt >= settings.llm_rate_limit_retries:
+                    raise
+                if retry_after is None:
+                    # Nothing blocks the shared bucket, so back off locally as well
+                    await asyncio.sleep(backoff(attempt))
+            except (openai.APIConnectionError, openai.InternalServerError):
+                if not rate_limiter.enabled or attempt >= settings.openai_max_retries:
+                    raise
+                await asyncio.sleep(backoff(attempt))
+            else:
+                await rate_limiter.on_success()
+                usage = getattr(response, "usage_metadata", None) or {}
+                await rate_limiter.record_usage(estimated_tokens, usage.get("total_tokens"))
+                return response
+            attempt += 1
+
+    async def aclose(self):
+        """Close the running loop's HTTP connections"""
+        loop = asyncio.get_running_loop()
+        self._clients.pop(loop, None)
+        http_client = self._http_clients.pop(loop, None)
+        if http_client is not None:
+            await http_client.aclose()
+
+llm_client = LLMClient()
@@ -0,0 +1,82 @@
+import logging
+import os
+import shutil
+import tempfile
+from typing import BinaryIO, Optional
+from app.core.config import settings
+from app.services.base_storage import BaseStorage
+
+logger = logging.getLogger(__name__)
+
+class LocalStorageService(BaseStorage):
+    """Storage on a local or NFS-mounted directory shared by the API and workers"""
+
+    def __init__(self):
+        super().__init__()
+        self.root = settings.local_storage_root
+
+    def _full_path(self, remote_path: str) -> str:
+        root = os.path.realpath(self.root)
+        full_path = os.path.realpath(os.path.join(root, remote_path.lstrip('/')))
+        # Refuse '..' components or symlinks that would leave the storage root
+        if os.path.commonpath([root, full_path]) != root:
+            raise ValueError(f"Path outside the storage root: {remote_path}")
+        return full_path
+
+    def upload_stream(self, fileobj: BinaryIO, remote_path: str) -> bool:
+        """Write via a temp file and rename so readers never see a partial file"""
+        try:
+            full_path = self._full_path(remote_path)
+            os.makedirs(os.path.dirname(full_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(full_path), suffix=".tmp")
+            try:
+                with os.fdopen(fd, "wb") as f:
+                    shutil.copyfileobj(fileobj, f, self.chunk_size)
+                os.replace(tmp_path, full_path)
+            except BaseException:
+                os.unlink(tmp_path)
+                raise
+            logger.info(f"Stored file: {remote_path}")
+            return True
+        except Exception as e:
+            logger.error(f"Local storage write error for {remote_path}: {e}")
+            return False
+
+    def download_to(self, remote_path: str, fileobj: BinaryIO) -> bool:
+        try:
+            with open(self._full_path(remote_path), "rb") as f:
+                shutil.copyfileobj(f, fileobj, self.chunk_size)
+            return True
+        except Exception as e:
+            logger.error(f"Local storage read error for {remote_path}: {e}")
+            return False
+
+    def local_path(self, remote_path: str) -> Optional[str]:
+        full_path = self._full_path(remote_path)
+        return full_path if os.path.isfile(full_path) else None
+
+    def file_exists(self, remote_path: str) -> bool:
+        return os.path.isfile(self._full_path(remote_path))
+
+    def delete_file(self, remote_path: str) -> bool:
+        try:
+            os.remove(self._full_path(remote_path))
+            return True
+        except Exception as e:
+            logger.error(f"Local storage delete error for {remote_path}: {e}")
+            return False
+
+    def rename_file(self, from_path: str, to_path: str) -> bool:
+        try:
+            full_to_path = self._full_path(to_path)
+            os.makedirs(os.path.dirname(full_to_path), exist_ok=True)
+            os.replace(self._full_path(from_path), full_to_path)
+            return True
+        except Exception as e:
+            logger.error(f"Local storage rename error {from_path} -> {to_path}: {e}")
+            return False
+
+    def ensure_base_directories(self) -> bool:
+        for path in (self.base_path, self.files_path, self.csv_path):
+            os.makedirs(self._full_path(path), exist_ok=True)
+        return True
@@ -0,0 +1,42 @@
+import asyncio
+import logging
+import redis
+from typing import Dict
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class MetricsService:
+    """Counters shared by the API and every worker process, kept in Redis hashes"""
+
+    PREFIX = "iscan:metrics:"
+
+    def __init__(self):
+        self.redis_client = redis.from_url(settings.redis_url)
+
+    def incr(self, name: str, field: str, amount: float = 1):
+        # Metrics must never fail the operation being measured
+        try:
+            if isinstance(amount, int):
+                self.redis_client.hincrby(f"{self.PREFIX}{name}", field, amount)
+            else:
+                self.redis_client.hincrbyfloat(f"{self.PREFIX}{name}", field, amount)
+        except redis.RedisError as e:
+            logger.warning(f"Could not record metric {name}.{field}: {e}")
+
+    async def aincr(self, name: str, field: str, amount: float = 1):
+        """incr() for coroutines on the shared event loop, which must not wait on Redis"""
+        await asyncio.to_thread(self.incr, name, field, amount)
+
+    def get(self, name: str) -> Dict[str, float]:
+        raw = self.redis_client.hgetall(f"{self.PREFIX}{name}")
+        return {key.decode(): float(value) for key, value in raw.items()}
+
+    def get_all(self) -> Dict[str, Dict[str, float]]:
+        metrics = {}
+        for key in self.redis_client.scan_iter(f"{self.PREFIX}*"):
+            name = key.decode()[len(self.PREFIX):]
+            metrics[name] = self.get(name)
+        return metrics
+
+metrics_service = MetricsService()
@@ -0,0 +1,42 @@
+import json
+import logging
+import uuid
+import redis
+from typing import Any, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class PipelineService:
+    """Hand-off store for the staged pipeline (fetch -> extract -> llm -> persist).
+
+    Stages run on separate queues, possibly on different hosts, and pass each other
+    small job dicts; anything bulky (page texts the text cache can't hold, LLM
+    results) is parked in Redis under a random key that travels in the job instead.
+    Entries expire so an abandoned chain can't leak them.
+    """
+
+    PREFIX = "iscan:pipeline:"
+
+    def __init__(self):
+        self.enabled = settings.pipeline_stages_enabled
+        self.ttl = settings.pipeline_handoff_ttl
+        self.redis_client = redis.from_url(settings.redis_url)
+
+    def put(self, value: Any) -> str:
+        key = f"{self.PREFIX}{uuid.uuid4().hex}"
+        self.redis_client.set(key, json.dumps(value), ex=self.ttl)
+        return key
+
+    def get(self, key: str) -> Optional[Any]:
+        value = self.redis_client.get(key)
+        return json.loads(value) if value is not None else None
+
+    def delete(self, key: str):
+        try:
+            self.redis_client.delete(key)
+        except redis.RedisError as e:
+            # The entry expires on its own
+            logger.warning(f"Could not delete pipeline hand-off {key}: {e}")
+
+pipeline_service = PipelineService()
@@ -0,0 +1,216 @@
+import json
+import logging
+import threading
+import time
+import redis
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, Optional
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+# Take over a claim only if it is still held by the owner we found dead
+TAKEOVER_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    redis.call('SET', KEYS[1], ARGV[2], 'EX', tonumber(ARGV[3]))
+    return 1
+end
+return 0
+"""
+
+# Release a claim only if this owner still holds it
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+# Use up one of a file's skip tokens if it has any
+CONSUME_SKIP_SCRIPT = """
+if tonumber(redis.call('GET', KEYS[1]) or '0') > 0 then
+    redis.call('DECR', KEYS[1])
+    return 1
+end
+return 0
+"""
+
+class PrefetchService:
+    """Lets a worker reserve the next queued document while its current one waits on the LLM.
+
+    Every enqueued file is also pushed onto a bounded Redis list. A task claims
+    its own file and any file it reserves from that list, with its Celery task id
+    as the claim value, and keeps a heartbeat while it runs. The Celery task
+    delivered for a file claimed by another live task becomes a no-op; claims of
+    dead owners are taken over, and the files a dead owner had reserved but never
+    finished are re-enqueued. Claims are released as soon as a file is done.
+
+    Reserving a file also leaves a skip token for it: the file's own Celery task,
+    still queued, uses the token up and does nothing instead of processing the
+    file a second time. Tokens are counted so re-enqueued files (reprocessing)
+    are only skipped as often as they were reserved.
+    """
+
+    PENDING_KEY = "iscan:prefetch:pending"
+    CLAIM_PREFIX = "iscan:prefetch:claim:"
+    ALIVE_PREFIX = "iscan:prefetch:alive:"
+    RESERVED_PREFIX = "iscan:prefetch:reserved:"
+    OWNERS_KEY = "iscan:prefetch:owners"
+    SKIP_PREFIX = "iscan:prefetch:skip:"
+
+    def __init__(self):
+        self.enabled = settings.worker_prefetch_enabled
+        self.claim_ttl = settings.worker_prefetch_claim_ttl
+        self.heartbeat_ttl = settings.worker_prefetch_heartbeat_ttl
+        self.max_pending = settings.worker_prefetch_max_pending
+        self.skip_ttl = settings.worker_prefetch_skip_ttl
+        self.recover_interval = settings.worker_prefetch_recover_interval
+        self._last_recover = 0.0
+        self._recover_lock = threading.Lock()
+        self.redis_client = redis.from_url(settings.redis_url)
+        self._takeover = self.redis_client.register_script(TAKEOVER_SCRIPT)
+        self._release = self.redis_client.register_script(RELEASE_SCRIPT)
+        self._consume_skip = self.redis_client.register_script(CONSUME_SKIP_SCRIPT)
+
+    @staticmethod
+    def encode(file_id: int, file_type_id: int, batch_id: Optional[int], force_reprocess: bool) -> str:
+        """Queue entry for a file; deterministic so an entry can be removed by value"""
+        return json.dumps({
+            "file_id": file_id,
+            "file_type_id": file_type_id,
+            "batch_id": batch_id,
+            "force_reprocess": force_reprocess
+        })
+
+    def push(
+        self,
+        file_ids: List[int],
+        file_type_id: int,
+        batch_id: Optional[int] = None,
+        force_reprocess: bool = False
+    ):
+        if not self.enabled or not file_ids:
+            return
+        jobs = [self.encode(file_id, file_type_id, batch_id, force_reprocess) for file_id in file_ids]
+        # Every entry also has its own Celery task, so entries past the bound are only not prefetched
+        pipe = self.redis_client.pipeline()
+        pipe.rpush(self.PENDING_KEY, *jobs)
+        pipe.ltrim(self.PENDING_KEY, 0, self.max_pending - 1)
+        pipe.execute()
+
+    def is_alive(self, owner: str) -> bool:
+        return bool(self.redis_client.exists(f"{self.ALIVE_PREFIX}{owner}"))
+
+    def claim(self, file_id: int, owner: str, reclaim: bool = True) -> bool:
+        """True if owner now holds the file: it was free, held by a dead task, or (with reclaim) already owner's"""
+        key = f"{self.CLAIM_PREFIX}{file_id}"
+        while True:
+            if self.redis_client.set(key, owner, nx=True, ex=self.claim_ttl):
+                return True
+            holder = self.redis_client.get(key)
+            if holder is None:
+                continue
+            holder = holder.decode()
+            if holder == owner:
+                # Redelivery of the same task (worker lost, retry)
+                return reclaim
+            if self.is_alive(holder):
+                return False
+            if self._takeover(keys=[key], args=[holder, owner, self.claim_ttl]):
+                logger.info(f"Took over file {file_id} from dead task {holder}")
+                return True
+
+    def consume_skip(self, file_id: int) -> bool:
+        """True if the file was already processed by a task that reserved it, so this task must skip it"""
+        return bool(self._consume_skip(keys=[f"{self.SKIP_PREFIX}{file_id}"]))
+
+    def release(self, file_id: int, owner: str):
+        self._release(keys=[f"{self.CLAIM_PREFIX}{file_id}"], args=[owner])
+
+    def track(self, owner: str, job: Dict[str, Any]):
+        """Record a file as owner's until finish(), so it is re-enqueued if owner dies first"""
+        self.redis_client.rpush(f"{self.RESERVED_PREFIX}{owner}", job["raw"])
+
+    def finish(self, owner: str, job: Dict[str, Any]):
+        pipe = self.redis_client.pipeline()
+        pipe.lrem(f"{self.RESERVED_PREFIX}{owner}", 1, job["raw"])
+        pipe.lrem(self.PENDING_KEY, 1, job["raw"])
+        pipe.execute()
+        self.release(job["file_id"], owner)
+
+    def reserve_next(self, owner: str) -> Optional[Dict[str, Any]]:
+        """Move queued jobs to owner's reserved list until one can be claimed; None when nothing is waiting"""
+        reserved_key = f"{self.RESERVED_PREFIX}{owner}"
+        while True:
+            raw = self.redis_client.lmove(self.PENDING_KEY, reserved_key, "LEFT", "RIGHT")
+            if raw is None:
+                return None
+            job = json.loads(raw)
+            job["raw"] = raw.decode()
+            if self.claim(job["file_id"], owner, reclaim=False):
+                # The file's own queued task becomes redundant
+                skip_key = f"{self.SKIP_PREFIX}{job['file_id']}"
+                pipe = self.redis_client.pipeline()
+                pipe.incr(skip_key)
+                pipe.expire(skip_key, self.skip_ttl)
+                pipe.execute()
+                logger.info(f"Reserved file {job['file_id']} for prefetch")
+                return job
+            self.redis_client.lrem(reserved_key, 1, raw)
+
+    def recover(self):
+        """Re-enqueue the unfinished files of tasks whose heartbeat has expired.
+
+        Called at the start of every task but runs at most every recover_interval seconds per process.
+        """
+        from app.celery_app import celery_app
+
+        with self._recover_lock:
+            if time.monotonic() - self._last_recover < self.recover_interval:
+                return
+            self._last_recover = time.monotonic()
+
+        for owner in self.redis_client.smembers(self.OWNERS_KEY):
+            owner = owner.decode()
+            if self.is_alive(owner):
+                continue
+            reserved_key = f"{self.RESERVED_PREFIX}{owner}"
+            # Whoever removes the owner does the recovery
+            if not self.redis_client.srem(self.OWNERS_KEY, owner):
+                continue
+            for raw in self.redis_client.lrange(reserved_key, 0, -1):
+                job = json.loads(raw)
+                logger.warning(f"Re-enqueueing file {job['file_id']} left unfinished by dead task {owner}")
+                celery_app.send_task(
+                    "app.tasks.process_document_task",
+                    args=[job["file_id"], job["file_type_id"], job["batch_id"], job["force_reprocess"]]
+                )
+            self.redis_client.delete(reserved_key)
+
+    @contextmanager
+    def owning(self, owner: str) -> Iterator[None]:
+        """Keep owner's heartbeat alive for the duration of a task"""
+        alive_key = f"{self.ALIVE_PREFIX}{owner}"
+        stopped = threading.Event()
+
+        def beat():
+            while not stopped.wait(self.heartbeat_ttl / 3):
+                try:
+                    self.redis_client.set(alive_key, 1, ex=self.heartbeat_ttl)
+                except redis.RedisError as e:
+                    logger.warning(f"Prefetch heartbeat failed: {e}")
+
+        self.redis_client.set(alive_key, 1, ex=self.heartbeat_ttl)
+        self.redis_client.sadd(self.OWNERS_KEY, owner)
+        heartbeat = threading.Thread(target=beat, name="prefetch-heartbeat", daemon=True)
+        heartbeat.start()
+        try:
+            yield
+        finally:
+            stopped.set()
+            self.redis_client.delete(alive_key)
+            # Files left unfinished stay listed for recover() to re-enqueue
+            if not self.redis_client.llen(f"{self.RESERVED_PREFIX}{owner}"):
+                self.redis_client.srem(self.OWNERS_KEY, owner)
+
+prefetch_service = PrefetchService()
@@ -0,0 +1,101 @@
+import json
+import logging
+from typing import Any, Dict, Iterable, Iterator, Optional, Tuple
+import openai
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+class ProviderBatchService:
+    """Offline extraction through the provider's batch API (OpenAI /v1/files and /v1/batches).
+
+    Requests for a whole Batch are written to one JSONL file, uploaded and run by the
+    provider within the completion window at batch pricing; results are fetched once the
+    provider batch reaches a terminal status.
+    """
+
+    ENDPOINT = "/v1/chat/completions"
+    PENDING = ("validating", "in_progress", "finalizing", "cancelling")
+
+    def __init__(self):
+        self._client: Optional[openai.OpenAI] = None
+
+    @property
+    def client(self) -> openai.OpenAI:
+        if self._client is None:
+            self._client = openai.OpenAI(
+                api_key=settings.openai_api_key,
+                base_url=settings.openai_base_url,
+                timeout=settings.openai_timeout,
+                max_retries=settings.openai_max_retries
+            )
+        return self._client
+
+    @staticmethod
+    def custom_id(file_id: int) -> str:
+        return f"file-{file_id}"
+
+    @staticmethod
+    def file_id(custom_id: str) -> Optional[int]:
+        prefix, _, file_id = custom_id.partition("-")
+        return int(file_id) if prefix == "file" and file_id.isdigit() else None
+
+    def request_line(
+        self,
+        file_id: int,
+        model: str,
+        system_prompt: str,
+        user_message: str,
+        response_format: Optional[Dict[str, Any]] = None
+    ) -> str:
+        body = {
+            "model": model,
+            "temperature": 0,
+            "messages": [
+                {"role": "system", "content": system_prompt},
+                {"role": "user", "content": user_message},
+            ],
+        }
+        if response_format:
+            body["response_format"] = response_format
+        return json.dumps({"custom_id": self.custom_id(file_id), "method": "POST", "url": self.ENDPOINT, "body": body})
+
+    def submit(self, lines: Iterable[str], metadata: Optional[Dict[str, str]] = None) -> str:
+        """Upload the JSONL requests and start a provider batch; returns its id"""
+        data = "\n".join(lines).encode("utf-8")
+        input_file = self.client.files.create(file=("requests.jsonl", data), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=self.ENDPOINT,
+            completion_window=settings.provider_batch_completion_window,
+            metadata=metadata
+        )
+        logger.info(f"Submitted provider batch {batch.id} ({len(data)} bytes of requests)")
+        return batch.id
+
+    def retrieve(self, provider_batch_id: str):
+        return self.client.batches.retrieve(provider_batch_id)
+
+    def results(self, provider_batch) -> Iterator[Tuple[int, Optional[str], Optional[str], Optional[str]]]:
+        """(file id, reply content, error, model) for every line of the output and error files"""
+        for output_file_id in (provider_batch.output_file_id, provider_batch.error_file_id):
+            if not output_file_id:
+                continue
+            for line in self.client.files.content(output_file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                file_id = self.file_id(record.get("custom_id", ""))
+                if file_id is None:
+                    continue
+
+                response = record.get("response") or {}
+                if record.get("error") or response.get("status_code") != 200:
+                    error = record.get("error") or (response.get("body") or {}).get("error")
+                    yield file_id, None, f"Provider batch request failed: {error}", None
+                    continue
+                choices = response["body"].get("choices") or [{}]
+                content = (choices[0].get("message") or {}).get("content") or ""
+                yield file_id, content, None, response["body"].get("model")
+
+provider_batch_service = ProviderBatchService()
@@ -1,16 +1,91 @@
 import redis
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional
+from celery import chain, group
 from app.core.config import settings
 from app.celery_app import celery_app
+from app.services.prefetch_service import prefetch_service
 
 class QueueService:
     def __init__(self):
         self.redis_client = redis.from_url(settings.redis_url)
     
-    def enqueue_file_processing(self, file_id: int, file_type_id: int, batch_id: Optional[int] = None) -> str:
+    def enqueue_file_processing(
+        self,
+        file_id: int,
+        file_type_id: int,
+        batch_id: Optional[int] = None,
+        force_reprocess: bool = False
+    ) -> str:
+        if settings.pipeline_stages_enabled:
+            return self.enqueue_many_file_processing([file_id], file_type_id, batch_id, force_reprocess)[0]
         task = celery_app.send_task(
             "app.tasks.process_document_task",
-            args=[file_id, file_type_id, batch_id]
+            args=[file_id, file_type_id, batch_id, force_reprocess]
+        )
+        prefetch_service.push([file_id], file_type_id, batch_id, force_reprocess)
+        return task.id
+    
+    def enqueue_many_file_processing(
+        self,
+        file_ids: List[int],
+        file_type_id: int,
+        batch_id: Optional[int] = None,
+        force_reprocess: bool = False
+    ) -> List[str]:
+        """Publish one processing task per file as a single Celery group"""
+        if settings.pipeline_stages_enabled:
+            job = group(self._pipeline(file_id, file_type_id, batch_id, force_reprocess) for file_id in file_ids)
+            result = job.apply_async()
+            # A chain's id is its last (persist) task's
+            return [task.id for task in result.results]
+        job = group(
+            celery_app.signature(
+                "app.tasks.process_document_task",
+                args=[file_id, file_type_id, batch_id, force_reprocess]
+            )
+            for file_id in file_ids
+        )
+        result = job.apply_async()
+        prefetch_service.push(file_ids, file_type_id, batch_id, force_reprocess)
+        return [task.id for task in result.results]
+    
+    def _pipeline(self, file_id: int, file_type_id: int, batch_id: Optional[int], force_reprocess: bool):
+        """fetch -> extract -> llm -> persist chain; routed to their queues by task_routes"""
+        return chain(
+            celery_app.signature(
+                "app.tasks.fetch_document_task",
+                args=[file_id, file_type_id, batch_id, force_reprocess]
+            ),
+            celery_app.signature("app.tasks.extract_document_task"),
+            celery_app.signature("app.tasks.llm_document_task"),
+            celery_app.signature("app.tasks.persist_document_task")
+        )
+    
+    def enqueue_packed_file_processing(
+        self,
+        file_ids: List[int],
+        file_type_id: int,
+        batch_id: Optional[int] = None,
+        force_reprocess: bool = False
+    ) -> List[str]:
+        """Publish packed processing tasks of up to llm_pack_task_size files; returns each file's task id"""
+        size = settings.llm_pack_task_size
+        slices = [file_ids[start:start + size] for start in range(0, len(file_ids), size)]
+        job = group(
+            celery_app.signature(
+                "app.tasks.process_packed_documents_task",
+                args=[file_slice, file_type_id, batch_id, force_reprocess]
+            )
+            for file_slice in slices
+        )
+        result = job.apply_async()
+        return [task.id for task, file_slice in zip(result.results, slices) for _ in file_slice]
+    
+    def enqueue_provider_batch(self, batch_id: int, file_ids: List[int], file_type_id: int) -> str:
+        """Publish the task that submits these files to the provider's batch API"""
+        task = celery_app.send_task(
+            "app.tasks.submit_provider_batch_task",
+            args=[batch_id, file_ids, file_type_id]
         )
         return task.id
     
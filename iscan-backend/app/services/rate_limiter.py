@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import random
+import redis
+from typing import Optional
+from app.core.config import settings
+from app.services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
+
+# Both scripts read the clock with Redis TIME, so skew between worker hosts can't
+# refill or drain the shared buckets.
+CLOCK = """
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+"""
+
+# Two token buckets (requests and tokens per minute) refilled continuously and
+# scaled by an adaptive factor. Returns "0" when the request was admitted, else
+# the seconds to wait before capacity is expected.
+ACQUIRE_SCRIPT = CLOCK + """
+local rpm = tonumber(ARGV[1])
+local tpm = tonumber(ARGV[2])
+local need = tonumber(ARGV[3])
+local state = redis.call('HMGET', KEYS[1], 'requests', 'tokens', 'ts', 'factor', 'blocked_until')
+local factor = tonumber(state[4]) or 1
+local blocked_until = tonumber(state[5]) or 0
+if now < blocked_until then
+    return tostring(blocked_until - now)
+end
+
+local request_capacity = rpm * factor
+local token_capacity = tpm * factor
+local requests = tonumber(state[1]) or request_capacity
+local tokens = tonumber(state[2]) or token_capacity
+local elapsed = math.max(0, now - (tonumber(state[3]) or now))
+requests = math.min(request_capacity, requests + elapsed * request_capacity / 60)
+tokens = math.min(token_capacity, tokens + elapsed * token_capacity / 60)
+-- A request larger than the whole bucket is admitted once the bucket is full
+need = math.min(need, token_capacity)
+
+local wait = 0
+if requests >= 1 and tokens >= need then
+    requests = requests - 1
+    tokens = tokens - need
+else
+    wait = math.max((1 - requests) * 60 / request_capacity, (need - tokens) * 60 / token_capacity)
+end
+redis.call('HSET', KEYS[1], 'requests', tostring(requests), 'tokens', tostring(tokens), 'ts', tostring(now))
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(wait)
+"""
+
+# AIMD: halve the factor on a 429 (at most once per second, however many
+# workers see it) and honour retry-after; creep back up on every success.
+ADAPT_SCRIPT = CLOCK + """
+local limited = ARGV[1] == '1'
+local retry_after = tonumber(ARGV[2])
+local min_factor = tonumber(ARGV[3])
+local increase = tonumber(ARGV[4])
+local state = redis.call('HMGET', KEYS[1], 'factor', 'last_decrease', 'blocked_until')
+local factor = tonumber(state[1]) or 1
+if limited then
+    if now - (tonumber(state[2]) or 0) >= 1 then
+        factor = math.max(min_factor, factor / 2)
+        redis.call('HSET', KEYS[1], 'last_decrease', tostring(now))
+    end
+    if retry_after > 0 then
+        redis.call('HSET', KEYS[1], 'blocked_until', tostring(math.max(tonumber(state[3]) or 0, now + retry_after)))
+    end
+else
+    factor = math.min(1, factor + increase)
+end
+redis.call('HSET', KEYS[1], 'factor', tostring(factor))
+redis.call('EXPIRE', KEYS[1], 3600)
+return tostring(factor)
+"""
+
+class RateLimiter:
+    """Cluster-wide RPM/TPM limiter for LLM calls shared by every worker through Redis.
+
+    Callers wait for capacity before each request, are charged estimated input
+    plus expected output tokens, and settle the difference with the usage the
+    provider reports. 429 responses shrink the effective limit (multiplicative
+    decrease, retry-after respected) and successes grow it back (additive
+    increase), so the cluster converges just under the account's real limit.
+
+    Callers run on the worker's shared event loop, so every Redis round trip is
+    made from a thread instead of blocking the other documents' LLM calls.
+    """
+
+    KEY = "iscan:llm_rate_limit"
+    MAX_SLEEP = 5.0
+
+    def __init__(self):
+        self.rpm = settings.llm_rate_limit_rpm
+        self.tpm = settings.llm_rate_limit_tpm
+        self.redis_client = redis.from_url(settings.redis_url)
+        self._acquire = self.redis_client.register_script(ACQUIRE_SCRIPT)
+        self._adapt = self.redis_client.register_script(ADAPT_SCRIPT)
+
+    @property
+    def enabled(self) -> bool:
+        return self.rpm > 0 and self.tpm > 0
+
+    async def acquire(self, tokens: int):
+        """Wait until the cluster has capacity for one request of this many tokens"""
+        if not self.enabled:
+            return
+
+        waited = 0.0
+        while True:
+            try:
+                wait = float(await asyncio.to_thread(self._acquire, keys=[self.KEY], args=[self.rpm, self.tpm, tokens]))
+            except redis.RedisError as e:
+                # Without Redis there is no coordination; fall back to the provider's own limits
+                logger.warning(f"Rate limiter unavailable, not waiting: {e}")
+                return
+            if wait <= 0:
+                break
+            # Jitter keeps workers that were refused together from retrying in lockstep
+            sleep = min(wait, self.MAX_SLEEP) * random.uniform(1.0, 1.2)
+            await asyncio.sleep(sleep)
+            waited += sleep
+
+        if waited:
+            await metrics_service.aincr("llm_rate_limit", "waits")
+            await metrics_service.aincr("llm_rate_limit", "wait_seconds", round(waited, 3))
+
+    async def record_usage(self, estimated_tokens: int, actual_tokens: Optional[int]):
+        """Settle the estimate charged by acquire() against the provider's reported usage"""
+        if not self.enabled or actual_tokens is None:
+            return
+        try:
+            await asyncio.to_thread(self.redis_client.hincrbyfloat, self.KEY, "tokens", estimated_tokens - actual_tokens)
+        except redis.RedisError as e:
+            logger.warning(f"Could not record LLM token usage: {e}")
+
+    async def on_rate_limited(self, retry_after: Optional[float]):
+        await metrics_service.aincr("llm_rate_limit", "rate_limited")
+        await self._adapt_factor(True, retry_after or 0)
+
+    async def on_success(self):
+        await self._adapt_factor(False, 0)
+
+    async def _adapt_factor(self, limited: bool, retry_after: float):
+        if not self.enabled:
+            return
+        try:
+            factor = float(await asyncio.to_thread(self._adapt, keys=[self.KEY], args=[
+                "1" if limited else "0",
+                retry_after,
+                settings.llm_rate_limit_min_factor,
+                settings.llm_rate_limit_increase
+            ]))
+        except redis.RedisError as e:
+            logger.warning(f"Could not adapt LLM rate limit: {e}")
+            return
+        if limited:
+            logger.warning(f"LLM rate limited, effective limit now {factor:.0%} (retry-after {retry_after}s)")
+
+rate_limiter = RateLimiter()
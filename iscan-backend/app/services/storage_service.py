@@ -0,0 +1,14 @@
+from app.core.config import settings
+from app.services.base_storage import BaseStorage
+
+def create_storage() -> BaseStorage:
+    """Build the storage backend selected by settings.storage_backend"""
+    if settings.storage_backend == "ftp":
+        from app.services.ftp_service import ftp_service
+        return ftp_service
+    if settings.storage_backend == "local":
+        from app.services.local_storage_service import LocalStorageService
+        return LocalStorageService()
+    raise ValueError(f"Unknown storage backend: {settings.storage_backend}")
+
+storage_service = create_storage()
@@ -0,0 +1,136 @@
+import json
+import logging
+import threading
+import time
+import zlib
+from typing import Any, Dict, List, Optional
+from sqlalchemy import delete, func, select, update
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.langgraph.text_extraction import EXTRACTOR_VERSION
+from app.models.extracted_text import ExtractedText
+from app.services.metrics_service import metrics_service
+
+logger = logging.getLogger(__name__)
+
+class TextCacheService:
+    """Compressed page texts in the database, keyed by content hash and extractor version.
+
+    Reprocessing a document (e.g. after its file type's prompts change) reads the
+    text from here instead of downloading and re-extracting the PDF. Entries are
+    evicted least recently used first once the stored size exceeds the cap.
+
+    Reads and writes use their own short sessions, so a cache hit or a lost
+    insert race never commits or rolls back the caller's transaction.
+    """
+
+    def __init__(self):
+        self.max_bytes = settings.text_cache_max_bytes
+        self.compression_level = settings.text_cache_compression_level
+        self.evict_interval = settings.text_cache_evict_interval
+        self._last_evict = 0.0
+        self._evict_lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def _key(self, content_hash: str, variant: str):
+        return (
+            ExtractedText.content_hash == content_hash,
+            ExtractedText.extractor_version == EXTRACTOR_VERSION,
+            ExtractedText.variant == variant,
+        )
+
+    def get(self, content_hash: str, variant: str = "") -> Optional[List[str]]:
+        """Cached page texts, or None on a miss"""
+        if not self.enabled or not content_hash:
+            return None
+
+        with SessionLocal() as db:
+            entry = db.execute(
+                select(ExtractedText.id, ExtractedText.pages_data).where(*self._key(content_hash, variant))
+            ).first()
+            if entry is None:
+                metrics_service.incr("text_cache", "misses")
+                return None
+
+            db.execute(update(ExtractedText).where(ExtractedText.id == entry.id).values(last_used_at=func.now()))
+            db.commit()
+        metrics_service.incr("text_cache", "hits")
+        return json.loads(zlib.decompress(entry.pages_data))
+
+    def put(self, content_hash: str, page_texts: List[str], variant: str = ""):
+        if not self.enabled or not content_hash:
+            return
+
+        raw = json.dumps(page_texts).encode("utf-8")
+        compressed = zlib.compress(raw, self.compression_level)
+        with SessionLocal() as db:
+            db.add(ExtractedText(
+                content_hash=content_hash,
+                extractor_version=EXTRACTOR_VERSION,
+                variant=variant,
+                pages_data=compressed,
+                page_count=len(page_texts),
+                text_bytes=len(raw),
+                stored_bytes=len(compressed)
+            ))
+            try:
+                db.commit()
+            except IntegrityError:
+                # Another worker cached the same document first
+                db.rollback()
+                return
+
+        # The cap is enforced every evict_interval seconds per process, not on every insert
+        with self._evict_lock:
+            if time.monotonic() - self._last_evict < self.evict_interval:
+                return
+            self._last_evict = time.monotonic()
+        self.evict()
+
+    def evict(self):
+        """Drop least recently used entries until the stored size fits in max_bytes"""
+        with SessionLocal() as db:
+            total = db.scalar(select(func.coalesce(func.sum(ExtractedText.stored_bytes), 0)))
+            excess = total - self.max_bytes
+            if excess <= 0:
+                return
+
+            # Oldest entries whose cumulative size before them is still short of the excess
+            ranked = select(
+                ExtractedText.id,
+                ExtractedText.stored_bytes,
+                func.sum(ExtractedText.stored_bytes).over(
+                    order_by=(ExtractedText.last_used_at, ExtractedText.id)
+                ).label("cumulative")
+            ).subquery()
+            evicted = db.execute(
+                delete(ExtractedText).where(ExtractedText.id.in_(
+                    select(ranked.c.id).where(ranked.c.cumulative - ranked.c.stored_bytes < excess)
+                ))
+            ).rowcount
+            db.commit()
+        metrics_service.incr("text_cache", "evictions", evicted)
+        logger.info(f"Text cache evicted {evicted} entries ({excess} bytes over the cap)")
+
+    def stats(self, db: Session) -> Dict[str, Any]:
+        entries, text_bytes, stored_bytes = db.execute(
+            select(
+                func.count(ExtractedText.id),
+                func.coalesce(func.sum(ExtractedText.text_bytes), 0),
+                func.coalesce(func.sum(ExtractedText.stored_bytes), 0)
+            )
+        ).one()
+        return {
+            "entries": entries,
+            "text_bytes": text_bytes,
+            "stored_bytes": stored_bytes,
+            "max_bytes": self.max_bytes,
+            "extractor_version": EXTRACTOR_VERSION
+        }
+
+text_cache_service = TextCacheService()
@@ -1,5 +1,7 @@
-import asyncio
 import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, List, Optional
 from celery import current_task
 from sqlalchemy.orm import Session
 from app.celery_app import celery_app
@@ -18,16 +20,108 @@ def get_processors():
         "contract": ContractProcessor(),
     }
 
-@celery_app.task(bind=True)
-def process_document_task(self, file_id: int, file_type_id: int, batch_id: int = None):
-    # Import inside the task to avoid startup issues
+def _load_page_texts(
+    file_record,
+    page_selection: Optional[dict],
+    metrics: dict,
+    stage_prefix: str = ""
+) -> str:
+    """Text of a stored file's selected pages: from the text cache, else downloaded, extracted and cached"""
+    from app.services.storage_service import storage_service
+    from app.services.document_cache import document_cache
+    from app.services.text_cache_service import text_cache_service
+    from app.langgraph.document_processor import record_timing
+    from app.langgraph.text_extraction import extract_pages, extraction_variant
+
+    started = time.time()
+    variant = extraction_variant(page_selection)
+    page_texts = text_cache_service.get(file_record.content_hash, variant)
+    if page_texts is not None:
+        record_timing(metrics, f"{stage_prefix}text_cache", started)
+        return page_texts
+
+    # The PDF is streamed to disk and opened by path, never loaded into memory here;
+    # retries and reprocessing hit the host-local cache instead of downloading again
+    cache_key = file_record.content_hash or file_record.ftp_path
+    with document_cache.local_document(storage_service, file_record.ftp_path, cache_key) as file_path:
+        record_timing(metrics, f"{stage_prefix}download", started)
+        started = time.time()
+        page_texts = extract_pages(file_path=file_path, page_selection=page_selection, stats=metrics)
+        record_timing(metrics, f"{stage_prefix}extract", started)
+
+    text_cache_service.put(file_record.content_hash, page_texts, variant)
+    return page_texts
+
+def _prefetch_document(job: dict) -> dict:
+    """Download and extract a reserved document; runs on a helper thread during the LLM call"""
+    from app.core.database import SessionLocal
+    from app.models import File, FileType
+
+    job["metrics"] = {}
+    db: Session = SessionLocal()
+
+    try:
+        file_record = db.query(File).filter(File.id == job["file_id"]).first()
+        file_type = db.query(FileType).filter(FileType.id == job["file_type_id"]).first()
+        if file_record and file_type:
+            page_selection = file_type.processing_prompts.get("page_selection")
+            job["page_texts"] = _load_page_texts(file_record, page_selection, job["metrics"], "prefetch_")
+    except Exception as e:
+        logger.warning(f"Prefetch of file {job['file_id']} failed, processing it without prefetch: {e}")
+    finally:
+        db.close()
+
+    return job
+
+def _result_row(file_id: int, file_type, batch_id: Optional[int], result: dict, metrics: dict, processor):
+    """ProcessingResult column values and the file's final status for a pipeline result"""
+    from app.models.file import FileStatus
+
+    row = {
+        "file_id": file_id,
+        "batch_id": batch_id,
+        "result_data": {},
+        "error_message": None,
+        "prompt_version": file_type.prompt_version,
+        "processing_metrics": metrics,
+        "model_used": metrics.get("model_used"),
+        "escalated": metrics.get("escalated", False)
+    }
+    if "error" in result:
+        row["error_message"] = result["error"]
+        return row, FileStatus.FAILED
+
+    if processor:
+        result = processor.process_result(result)
+    row["result_data"] = result
+    return row, FileStatus.COMPLETED
+
+def _store_result(db: Session, file_record, file_type, batch_id: Optional[int], result: dict, metrics: dict, processor) -> dict:
+    """Add the file's ProcessingResult and final status for a pipeline result; the caller commits"""
+    from app.models import ProcessingResult
+
+    row, file_record.status = _result_row(file_record.id, file_type, batch_id, result, metrics, processor)
+    db.add(ProcessingResult(**row))
+    return result if row["error_message"] else row["result_data"]
+
+def _process_file(
+    file_id: int,
+    file_type_id: int,
+    batch_id: int = None,
+    page_texts: Optional[List[str]] = None,
+    metrics: Optional[dict] = None,
+    start_prefetch: Optional[Callable[[], None]] = None,
+    force_reprocess: bool = False
+):
+    """Process one file and store its ProcessingResult; re-raises after recording a failure"""
     from app.core.database import SessionLocal
     from app.models import File, FileType, ProcessingResult
     from app.models.file import FileStatus
-    from app.services.ftp_service import ftp_service
+    from app.core.async_runner import run_async
     from app.langgraph.document_processor import process_document
 
     db: Session = SessionLocal()
+    metrics = metrics if metrics is not None else {}
 
     try:
         file_record = db.query(File).filter(File.id == file_id).first()
@@ -41,37 +135,36 @@ def process_document_task(self, file_id: int, file_type_id: int, batch_id: int =
         file_record.status = FileStatus.PROCESSING
         db.commit()
 
-        file_content = ftp_service.download_file(file_record.ftp_path)
-        if not file_content:
-            raise Exception(f"Could not download file from FTP: {file_record.ftp_path}")
-
         processors = get_processors()
         processor = processors.get(file_type.name.lower())
         prompts = file_type.processing_prompts
 
         logger.info(f"File prompts: {prompts}")
-        result = asyncio.run(process_document(file_content, prompts))
 
-        if "error" in result:
-            file_record.status = FileStatus.FAILED
-            processing_result = ProcessingResult(
-                file_id=file_id,
-                batch_id=batch_id,
-                result_data={},
-                error_message=result["error"]
-            )
+        # Overlap the next document's download and extraction with this one's LLM wait
+        if start_prefetch:
+            start_prefetch()
+
+        try:
+            if page_texts is None:
+                page_texts = _load_page_texts(file_record, prompts.get("page_selection"), metrics)
+        except IOError:
+            raise
+        except Exception as e:
+            result = {"error": f"PDF extraction failed: {str(e)}"}
         else:
-            if processor:
-                result = processor.process_result(result)
-
-            file_record.status = FileStatus.COMPLETED
-            processing_result = ProcessingResult(
-                file_id=file_id,
-                batch_id=batch_id,
-                result_data=result
-            )
-
-        db.add(processing_result)
+            result = run_async(process_document(
+                None,
+                prompts,
+                page_texts=page_texts,
+                metrics=metrics,
+                bypass_llm_cache=force_reprocess,
+                file_type=file_type.name
+            ))
+
+        logger.info(f"File {file_id} stage timings: {metrics.get('timings')}")
+
+        result = _store_result(db, file_record, file_type, batch_id, result, metrics, processor)
         db.commit()
 
         return {"status": "completed", "result": result}
@@ -94,14 +187,526 @@ def process_document_task(self, file_id: int, file_type_id: int, batch_id: int =
     finally:
         db.close()
 
+@celery_app.task(bind=True)
+def process_document_task(self, file_id: int, file_type_id: int, batch_id: int = None, force_reprocess: bool = False):
+    from app.core.config import settings
+    from app.services.prefetch_service import prefetch_service
+
+    if not prefetch_service.enabled:
+        return _process_file(file_id, file_type_id, batch_id, force_reprocess=force_reprocess)
+
+    owner = self.request.id
+    job = {
+        "file_id": file_id,
+        "file_type_id": file_type_id,
+        "batch_id": batch_id,
+        "raw": prefetch_service.encode(file_id, file_type_id, batch_id, force_reprocess)
+    }
+    prefetch_service.recover()
+    if prefetch_service.consume_skip(file_id):
+        logger.info(f"File {file_id} was already processed by a prefetching worker, skipping")
+        return {"status": "skipped", "file_id": file_id}
+
+    # Prefetch mode: while each document waits on the LLM, reserve the next queued one
+    # and download + extract it on a helper thread, then process it right after
+    with prefetch_service.owning(owner), ThreadPoolExecutor(max_workers=1, thread_name_prefix="prefetch") as prefetcher:
+        if not prefetch_service.claim(file_id, owner):
+            logger.info(f"File {file_id} is being processed by another prefetching worker, skipping")
+            return {"status": "skipped", "file_id": file_id}
+        prefetch_service.track(owner, job)
+        reserved = []
+        chained = 0
+
+        def start_prefetch():
+            if chained < settings.worker_prefetch_max_chain:
+                next_job = prefetch_service.reserve_next(owner)
+                if next_job:
+                    reserved.append(prefetcher.submit(_prefetch_document, next_job))
+
+        try:
+            return _process_file(
+                file_id,
+                file_type_id,
+                batch_id,
+                start_prefetch=start_prefetch,
+                force_reprocess=force_reprocess
+            )
+        finally:
+            prefetch_service.finish(owner, job)
+            # A reserved document is claimed by this task, so it must be processed here
+            while reserved:
+                next_job = reserved.pop().result()
+                chained += 1
+                try:
+                    _process_file(
+                        next_job["file_id"],
+                        next_job["file_type_id"],
+                        next_job["batch_id"],
+                        page_texts=next_job.get("page_texts"),
+                        metrics=next_job["metrics"],
+                        start_prefetch=start_prefetch,
+                        force_reprocess=next_job.get("force_reprocess", False)
+                    )
+                except Exception as e:
+                    logger.error(f"Prefetched file {next_job['file_id']} failed: {e}")
+                finally:
+                    prefetch_service.finish(owner, next_job)
+
+def _load_stage(db: Session, job: dict):
+    """File and FileType for a pipeline job"""
+    from app.models import File, FileType
+
+    file_record = db.query(File).filter(File.id == job["file_id"]).first()
+    if not file_record:
+        raise Exception(f"File with id {job['file_id']} not found")
+    file_type = db.query(FileType).filter(FileType.id == job["file_type_id"]).first()
+    if not file_type:
+        raise Exception(f"FileType with id {job['file_type_id']} not found")
+    return file_record, file_type
+
+def _fail_stage(job: dict, error: Exception):
+    """Record a stage failure like _process_file does; the caller re-raises to stop the chain"""
+    from app.core.database import SessionLocal
+    from app.models import File, ProcessingResult
+    from app.models.file import FileStatus
+
+    db: Session = SessionLocal()
+    try:
+        db.query(File).filter(File.id == job["file_id"]).update(
+            {File.status: FileStatus.FAILED},
+            synchronize_session=False
+        )
+        db.add(ProcessingResult(
+            file_id=job["file_id"],
+            batch_id=job["batch_id"],
+            result_data={},
+            error_message=str(error)
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+@celery_app.task(bind=True)
+def fetch_document_task(self, file_id: int, file_type_id: int, batch_id: int = None, force_reprocess: bool = False):
+    """Pipeline stage 1: start the file and stage its PDF in this host's document cache.
+
+    Skipped when the text cache already holds the document's text. Running fetch and
+    extract workers on the same host (or a shared DOCUMENT_CACHE_DIR) lets extract
+    read the staged file instead of downloading it again.
+    """
+    from app.core.database import SessionLocal
+    from app.models.file import FileStatus
+    from app.langgraph.document_processor import record_timing
+    from app.langgraph.text_extraction import extraction_variant
+    from app.services.document_cache import document_cache
+    from app.services.storage_service import storage_service
+    from app.services.text_cache_service import text_cache_service
+
+    job = {
+        "file_id": file_id,
+        "file_type_id": file_type_id,
+        "batch_id": batch_id,
+        "force_reprocess": force_reprocess,
+        "metrics": {}
+    }
+    db: Session = SessionLocal()
+
+    try:
+        file_record, file_type = _load_stage(db, job)
+        file_record.status = FileStatus.PROCESSING
+        db.commit()
+
+        started = time.time()
+        variant = extraction_variant(file_type.processing_prompts.get("page_selection"))
+        if text_cache_service.get(file_record.content_hash, variant) is not None:
+            job["text_cached"] = True
+        elif document_cache.enabled:
+            with document_cache.local_document(storage_service, file_record.ftp_path, file_record.content_hash or file_record.ftp_path):
+                record_timing(job["metrics"], "fetch", started)
+        return job
+    except Exception as e:
+        _fail_stage(job, e)
+        raise e
+    finally:
+        db.close()
+
+@celery_app.task(bind=True)
+def extract_document_task(self, job: dict):
+    """Pipeline stage 2: extract the PDF's text into the text cache (or a Redis hand-off)"""
+    from app.core.database import SessionLocal
+    from app.services.pipeline_service import pipeline_service
+    from app.services.text_cache_service import text_cache_service
+
+    if job.get("text_cached"):
+        return job
+
+    db: Session = SessionLocal()
+
+    try:
+        file_record, file_type = _load_stage(db, job)
+        try:
+            page_texts = _load_page_texts(file_record, file_type.processing_prompts.get("page_selection"), job["metrics"])
+        except IOError:
+            raise
+        except Exception as e:
+            job["result_key"] = pipeline_service.put({"error": f"PDF extraction failed: {str(e)}"})
+            return job
+
+        # Without the text cache the text itself has to travel by reference
+        if not text_cache_service.enabled or not file_record.content_hash:
+            job["text_key"] = pipeline_service.put(page_texts)
+        return job
+    except Exception as e:
+        _fail_stage(job, e)
+        raise e
+    finally:
+        db.close()
+
+@celery_app.task(bind=True)
+def llm_document_task(self, job: dict):
+    """Pipeline stage 3: run the LLM graph on the extracted text and park the result in Redis"""
+    from app.core.database import SessionLocal
+    from app.core.async_runner import run_async
+    from app.langgraph.document_processor import process_document
+    from app.services.pipeline_service import pipeline_service
+
+    if "result_key" in job:
+        return job
+
+    db: Session = SessionLocal()
+
+    try:
+        try:
+            file_record, file_type = _load_stage(db, job)
+            prompts = file_type.processing_prompts
+            file_type_name = file_type.name
+            page_texts = pipeline_service.get(job["text_key"]) if "text_key" in job else None
+            if page_texts is None:
+                # Text cache hit in the normal case; re-extracts if the entry was evicted meanwhile
+                page_texts = _load_page_texts(file_record, prompts.get("page_selection"), job["metrics"], "llm_")
+        finally:
+            # Don't hold a database connection for the length of the LLM call
+            db.close()
+
+        result = run_async(process_document(
+            None,
+            prompts,
+            page_texts=page_texts,
+            metrics=job["metrics"],
+            bypass_llm_cache=job["force_reprocess"],
+            file_type=file_type_name
+        ))
+        job["result_key"] = pipeline_service.put(result)
+        if "text_key" in job:
+            pipeline_service.delete(job.pop("text_key"))
+        return job
+    except Exception as e:
+        _fail_stage(job, e)
+        raise e
+
+@celery_app.task(bind=True)
+def persist_document_task(self, job: dict):
+    """Pipeline stage 4: validate the result through the file type's processor and store it"""
+    from app.core.database import SessionLocal
+    from app.services.pipeline_service import pipeline_service
+
+    db: Session = SessionLocal()
+
+    try:
+        result = pipeline_service.get(job["result_key"])
+        if result is None:
+            raise Exception(f"Pipeline result for file {job['file_id']} expired before it was stored")
+
+        file_record, file_type = _load_stage(db, job)
+        processor = get_processors().get(file_type.name.lower())
+        logger.info(f"File {job['file_id']} stage timings: {job['metrics'].get('timings')}")
+        result = _store_result(db, file_record, file_type, job["batch_id"], result, job["metrics"], processor)
+        db.commit()
+        pipeline_service.delete(job["result_key"])
+
+        return {"status": "completed", "result": result}
+    except Exception as e:
+        db.rollback()
+        _fail_stage(job, e)
+        raise e
+    finally:
+        db.close()
+
+@celery_app.task(bind=True)
+def process_packed_documents_task(
+    self,
+    file_ids: List[int],
+    file_type_id: int,
+    batch_id: int = None,
+    force_reprocess: bool = False
+):
+    """Process many small files of one type with several documents per LLM request.
+
+    Files that don't fit a pack, fail to load, or whose pack reply can't be split into
+    per-document results go through the regular single-document path afterwards.
+    """
+    from app.core.database import SessionLocal
+    from app.models import File, FileType
+    from app.models.file import FileStatus
+    from app.core.async_runner import run_async
+    from app.langgraph.document_processor import process_packed_documents
+
+    db: Session = SessionLocal()
+    individual = []
+    packed = 0
+
+    try:
+        file_type = db.query(FileType).filter(FileType.id == file_type_id).first()
+        if not file_type:
+            raise Exception(f"FileType with id {file_type_id} not found")
+        prompts = file_type.processing_prompts
+
+        files = {f.id: f for f in db.query(File).filter(File.id.in_(file_ids))}
+        for file_record in files.values():
+            file_record.status = FileStatus.PROCESSING
+        db.commit()
+
+        loaded = []
+        for file_id in file_ids:
+            file_record = files.get(file_id)
+            if not file_record:
+                individual.append((file_id, None, None))
+                continue
+            metrics = {}
+            try:
+                page_texts = _load_page_texts(file_record, prompts.get("page_selection"), metrics)
+            except Exception as e:
+                logger.warning(f"Could not load file {file_id} for packing: {e}")
+                individual.append((file_id, None, metrics))
+                continue
+            loaded.append((file_record, page_texts, metrics))
+
+        results = run_async(process_packed_documents(
+            [page_texts for _, page_texts, _ in loaded],
+            prompts,
+            [metrics for _, _, metrics in loaded],
+            bypass_llm_cache=force_reprocess,
+            file_type=file_type.name
+        )) if loaded else []
+
+        processor = get_processors().get(file_type.name.lower())
+        for (file_record, page_texts, metrics), result in zip(loaded, results):
+            if result is None:
+                individual.append((file_record.id, page_texts, metrics))
+                continue
+            _store_result(db, file_record, file_type, batch_id, result, metrics, processor)
+            packed += 1
+        db.commit()
+    finally:
+        db.close()
+
+    for file_id, page_texts, metrics in individual:
+        try:
+            _process_file(
+                file_id,
+                file_type_id,
+                batch_id,
+                page_texts=page_texts,
+                metrics=metrics,
+                force_reprocess=force_reprocess
+            )
+        except Exception as e:
+            logger.error(f"File {file_id} failed: {e}")
+
+    logger.info(f"Processed {packed} files in packs and {len(individual)} individually")
+    return {"status": "completed", "packed": packed, "individual": len(individual)}
+
+@celery_app.task(bind=True)
+def submit_provider_batch_task(self, batch_id: int, file_ids: List[int], file_type_id: int):
+    """Write the extraction requests for a batch's files to JSONL and submit them to the provider's batch API"""
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.models import Batch, File, FileType, ProviderBatch
+    from app.models.batch import BatchStatus
+    from app.models.file import FileStatus
+    from app.langgraph.document_processor import build_prompt
+    from app.langgraph.model_routing import select_model
+    from app.langgraph.text_compaction import compact_pages
+    from app.services.provider_batch_service import provider_batch_service
+    from app.services.queue_service import queue_service
+
+    db: Session = SessionLocal()
+
+    try:
+        batch = db.query(Batch).filter(Batch.id == batch_id).first()
+        if not batch:
+            raise Exception(f"Batch with id {batch_id} not found")
+        file_type = db.query(FileType).filter(FileType.id == file_type_id).first()
+        if not file_type:
+            raise Exception(f"FileType with id {file_type_id} not found")
+        prompts = file_type.processing_prompts
+        processor = get_processors().get(file_type.name.lower())
+
+        lines = []
+        submitted = []
+        for file_record in db.query(File).filter(File.id.in_(file_ids)):
+            file_record.status = FileStatus.PROCESSING
+            metrics = {}
+            try:
+                page_texts = _load_page_texts(file_record, prompts.get("page_selection"), metrics)
+            except Exception as e:
+                _store_result(db, file_record, file_type, batch_id, {"error": f"PDF extraction failed: {str(e)}"}, metrics, processor)
+                continue
+
+            pages, text, stats = compact_pages(page_texts, prompts.get("compaction"))
+            if not text:
+                _store_result(db, file_record, file_type, batch_id, {"error": "No text could be extracted from the document"}, metrics, processor)
+                continue
+
+            # Same prompt and structured-output format as interactive processing
+            model = select_model(prompts, stats["tokens_after"], len(pages))
+            system_prompt, user_message, response_format = build_prompt(prompts, text)
+            lines.append(provider_batch_service.request_line(
+                file_record.id, model, system_prompt, user_message, response_format=response_format
+            ))
+            submitted.append(file_record.id)
+        db.commit()
+
+        # Other files of the batch may still be in flight, so its status is left alone
+        if not submitted:
+            return {"status": "completed", "submitted": 0}
+
+        try:
+            provider_batch_id = provider_batch_service.submit(lines, {"batch_id": str(batch_id)})
+        except Exception as e:
+            # The batch still gets processed, just interactively and at full price
+            logger.error(f"Provider batch submission for batch {batch_id} failed, processing online: {e}")
+            queue_service.enqueue_many_file_processing(submitted, file_type_id, batch_id)
+            return {"status": "online", "submitted": 0}
+
+        # Each upload into a batch is its own provider batch, tracked and polled separately
+        provider_batch = ProviderBatch(
+            batch_id=batch_id,
+            provider_batch_id=provider_batch_id,
+            status="validating",
+            file_ids=submitted
+        )
+        db.add(provider_batch)
+        batch.status = BatchStatus.PROCESSING
+        db.commit()
+        provider_batch_row_id = provider_batch.id
+    finally:
+        db.close()
+
+    poll_provider_batch_task.apply_async(
+        args=[provider_batch_row_id, file_type_id],
+        countdown=settings.provider_batch_poll_interval
+    )
+    return {"status": "submitted", "submitted": len(submitted), "provider_batch_id": provider_batch_id}
+
+@celery_app.task(bind=True)
+def poll_provider_batch_task(self, provider_batch_row_id: int, file_type_id: int):
+    """Check a submitted provider batch; once it has finished, store every file's result in bulk"""
+    import openai
+    from sqlalchemy import func, insert, update
+    from app.core.config import settings
+    from app.core.database import SessionLocal
+    from app.models import Batch, File, FileType, ProcessingResult, ProviderBatch
+    from app.models.batch import BatchStatus
+    from app.models.file import FileStatus
+    from app.langgraph.document_processor import check_required_fields, parse_llm_response
+    from app.services.provider_batch_service import provider_batch_service
+
+    db: Session = SessionLocal()
+
+    try:
+        submission = db.query(ProviderBatch).filter(ProviderBatch.id == provider_batch_row_id).first()
+        if not submission:
+            raise Exception(f"Provider batch with id {provider_batch_row_id} not found")
+        if submission.completed_at is not None:
+            return {"status": submission.status}
+        file_type = db.query(FileType).filter(FileType.id == file_type_id).first()
+        if not file_type:
+            raise Exception(f"FileType with id {file_type_id} not found")
+        batch_id = submission.batch_id
+
+        try:
+            provider_batch = provider_batch_service.retrieve(submission.provider_batch_id)
+            replies = (
+                None if provider_batch.status in provider_batch_service.PENDING
+                else list(provider_batch_service.results(provider_batch))
+            )
+        except (openai.APIConnectionError, openai.RateLimitError, openai.InternalServerError) as e:
+            # The provider keeps the batch; a failed check must not end the polling chain
+            logger.warning(f"Could not check provider batch {submission.provider_batch_id}, retrying: {e}")
+            self.apply_async(args=[provider_batch_row_id, file_type_id], countdown=settings.provider_batch_poll_interval)
+            return {"status": submission.status}
+
+        submission.status = provider_batch.status
+        db.commit()
+
+        if replies is None:
+            self.apply_async(args=[provider_batch_row_id, file_type_id], countdown=settings.provider_batch_poll_interval)
+            return {"status": provider_batch.status}
+
+        prompts = file_type.processing_prompts
+        processor = get_processors().get(file_type.name.lower())
+        pending = set(submission.file_ids)
+        rows = []
+        statuses = {FileStatus.COMPLETED: [], FileStatus.FAILED: []}
+
+        def add(file_id: int, result: dict, model: Optional[str] = None):
+            metrics = {"provider_batch_id": submission.provider_batch_id, "model_used": model}
+            row, status = _result_row(file_id, file_type, batch_id, result, metrics, processor)
+            rows.append(row)
+            statuses[status].append(file_id)
+            pending.discard(file_id)
+
+        # Expired and cancelled batches still return whatever the provider finished
+        for file_id, content, error, model in replies:
+            if file_id not in pending:
+                continue
+            if error:
+                add(file_id, {"error": error})
+                continue
+            result = parse_llm_response(content)
+            check_required_fields(result, prompts)
+            add(file_id, result, model)
+
+        for file_id in list(pending):
+            add(file_id, {"error": f"No result in provider batch {submission.provider_batch_id} ({provider_batch.status})"})
+
+        if rows:
+            db.execute(insert(ProcessingResult), rows)
+        for status, status_file_ids in statuses.items():
+            if status_file_ids:
+                db.execute(update(File).where(File.id.in_(status_file_ids)).values(status=status))
+        submission.completed_at = func.now()
+        db.flush()
+
+        # The batch is done once none of its provider batches is still running
+        submissions = db.query(ProviderBatch).filter(ProviderBatch.batch_id == batch_id).all()
+        if all(other.completed_at is not None for other in submissions):
+            batch = db.query(Batch).filter(Batch.id == batch_id).first()
+            batch.status = (
+                BatchStatus.COMPLETED
+                if all(other.status == "completed" for other in submissions)
+                else BatchStatus.FAILED
+            )
+            batch.completed_at = func.now()
+        db.commit()
+
+        return {
+            "status": provider_batch.status,
+            "completed": len(statuses[FileStatus.COMPLETED]),
+            "failed": len(statuses[FileStatus.FAILED])
+        }
+    finally:
+        db.close()
+
 @celery_app.task(bind=True)
 def export_batch_to_csv(self, batch_id: int):
-    """Export batch processing results to CSV and upload to FTP"""
+    """Export batch processing results to CSV and upload to storage"""
     # Import inside the task to avoid startup issues
     from app.core.database import SessionLocal
     from app.models import Batch, ProcessingResult
     from app.models.batch import BatchStatus
-    from app.services.ftp_service import ftp_service
+    from app.services.storage_service import storage_service
 
     db: Session = SessionLocal()
 
@@ -145,9 +750,9 @@ def export_batch_to_csv(self, batch_id: int):
         df.to_csv(csv_buffer, index=False)
         csv_content = csv_buffer.getvalue().encode('utf-8')
 
-        # Upload to FTP
+        # Upload to storage
         csv_filename = f"batch_{batch_id}_results_{batch.created_at.strftime('%Y%m%d_%H%M%S')}.csv"
-        csv_path = ftp_service.upload_csv_file(csv_content, csv_filename)
+        csv_path = storage_service.upload_csv_file(csv_content, csv_filename)
 
         if csv_path:
             # Update batch with CSV path
@@ -155,7 +760,7 @@ def export_batch_to_csv(self, batch_id: int):
             db.commit()
             return {"status": "completed", "csv_path": csv_path}
         else:
-            raise Exception("Failed to upload CSV to FTP")
+            raise Exception("Failed to upload CSV to storage")
 
     except Exception as e:
         raise e
@@ -164,12 +769,12 @@ def export_batch_to_csv(self, batch_id: int):
 
 @celery_app.task(bind=True)
 def export_batch_to_json(self, batch_id: int):
-    """Export batch processing results to JSON and upload to FTP"""
+    """Export batch processing results to JSON and upload to storage"""
     # Import inside the task to avoid startup issues
     from app.core.database import SessionLocal
     from app.models import Batch, ProcessingResult
     from app.models.batch import BatchStatus
-    from app.services.ftp_service import ftp_service
+    from app.services.storage_service import storage_service
     import json
 
     db: Session = SessionLocal()
@@ -213,9 +818,9 @@ def export_batch_to_json(self, batch_id: int):
         # Generate JSON content
         json_content = json.dumps(json_data, indent=2, ensure_ascii=False).encode('utf-8')
 
-        # Upload to FTP
+        # Upload to storage
         json_filename = f"batch_{batch_id}_results_{batch.created_at.strftime('%Y%m%d_%H%M%S')}.json"
-        json_path = ftp_service.upload_json_file(json_content, json_filename)
+        json_path = storage_service.upload_json_file(json_content, json_filename)
 
         if json_path:
             # Update batch with JSON path
@@ -223,7 +828,7 @@ def export_batch_to_json(self, batch_id: int):
             db.commit()
             return {"status": "completed", "json_path": json_path}
         else:
-            raise Exception("Failed to upload JSON to FTP")
+            raise Exception("Failed to upload JSON to storage")
 
     except Exception as e:
         raise e
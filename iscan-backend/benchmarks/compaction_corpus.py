@@ -0,0 +1,76 @@
+#!/usr/bin/env python3
+"""Input tokens before and after text compaction over a fixed PDF corpus"""
+
+import argparse
+import glob
+import logging
+import os
+import random
+import sys
+import tempfile
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+def make_corpus(directory: str, documents: int, seed: int):
+    """Deterministic contracts/invoices with letterhead headers, footers and padded tables"""
+    import pymupdf
+
+    rng = random.Random(seed)
+    for doc_num in range(documents):
+        doc = pymupdf.open()
+        pages = rng.randint(1, 12)
+        for page_num in range(pages):
+            page = doc.new_page()
+            lines = [
+                "ACME Industrial Supplies LLC    |    12 Harbour Road, Springfield",
+                f"Contract No. C-{1000 + doc_num}          CONFIDENTIAL",
+                "",
+            ]
+            for item in range(rng.randint(15, 35)):
+                lines.append(
+                    f"{item + 1:>3}.   Clause {page_num}.{item}:   the Supplier shall deliver "
+                    f"{rng.randint(1, 500):>5} units      of item   SKU-{rng.randint(10000, 99999)}"
+                )
+            lines += ["", "", "", "Registered in Springfield, company no. 0123456", f"Page {page_num + 1} of {pages}"]
+            page.insert_textbox(page.rect + (36, 36, -36, -36), "\n".join(lines), fontsize=7)
+        doc.save(os.path.join(directory, f"doc_{doc_num:03d}.pdf"))
+        doc.close()
+
+def main(args):
+    logging.disable(logging.WARNING)
+    from app.langgraph.text_compaction import compact_pages
+    from app.langgraph.text_extraction import extract_pages
+
+    corpus = args.corpus
+    if not corpus:
+        corpus = tempfile.mkdtemp(prefix="compaction-corpus-")
+        make_corpus(corpus, args.documents, args.seed)
+
+    compaction = {"max_tokens": args.max_tokens} if args.max_tokens else None
+    total_before = total_after = 0
+    print(f"{'document':<24} {'pages':>5} {'before':>8} {'after':>8} {'saved':>7}")
+    print("-" * 56)
+    for path in sorted(glob.glob(os.path.join(corpus, "*.pdf"))):
+        page_texts = extract_pages(path)
+        _, _, stats = compact_pages(page_texts, compaction)
+        before, after = stats["tokens_before"], stats["tokens_after"]
+        total_before += before
+        total_after += after
+        saved = 100 * (before - after) / before if before else 0
+        print(f"{os.path.basename(path)[:24]:<24} {len(page_texts):>5} {before:>8} {after:>8} {saved:>6.1f}%")
+
+    print("-" * 56)
+    saved = 100 * (total_before - total_after) / total_before if total_before else 0
+    print(f"{'total':<24} {'':>5} {total_before:>8} {total_after:>8} {saved:>6.1f}%")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--corpus", help="directory of PDFs (default: generate a synthetic corpus)")
+    parser.add_argument("--documents", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--max-tokens", type=int, default=0, help="per-document token budget")
+    main(parser.parse_args())
@@ -0,0 +1,108 @@
+#!/usr/bin/env python3
+"""Peak RSS of download + text extraction for a large PDF: in-memory bytes vs streamed to disk"""
+
+import argparse
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+FTP_USER = "bench"
+FTP_PASSWORD = "bench"
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+def make_large_pdf(path: str, size_mb: int, pages: int):
+    """A few text pages plus an incompressible attachment to reach the target size"""
+    import pymupdf
+
+    doc = pymupdf.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        page.insert_text((72, 72), f"Invoice page {page_num + 1}\nTotal: {page_num * 10}.00")
+    doc.embfile_add("scan.bin", os.urandom(size_mb * 1024 * 1024))
+    doc.save(path)
+    doc.close()
+
+def start_ftp_server(root: str) -> int:
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+
+    # pyftpdlib only installs its own verbose logging when nothing is configured
+    logging.basicConfig(level=logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_user(FTP_USER, FTP_PASSWORD, root, perm="elradfmwMT")
+    handler = type("BenchHandler", (FTPHandler,), {"authorizer": authorizer})
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.address[1]
+
+def peak_rss_mb() -> float:
+    """VmHWM of this process; unlike ru_maxrss it is not inherited from the parent across exec"""
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError("VmHWM not available")
+
+def child(mode: str, remote_path: str):
+    """Run one download + extraction and print peak RSS in MB"""
+    logging.disable(logging.INFO)
+    import pymupdf
+    from app.services.ftp_service import FTPService
+    from app.services.document_cache import DocumentCache
+
+    storage = FTPService()
+    baseline = peak_rss_mb()
+
+    if mode == "bytes":
+        content = storage.download_file(remote_path)
+        doc = pymupdf.open(stream=content, filetype="pdf")
+        text = "".join(page.get_text() for page in doc)
+        doc.close()
+    else:
+        cache = DocumentCache(tempfile.mkdtemp(prefix="doc-cache-"), 0)
+        with cache.local_document(storage, remote_path, remote_path) as path:
+            doc = pymupdf.open(path, filetype="pdf")
+            text = "".join(page.get_text() for page in doc)
+            doc.close()
+
+    print(f"{peak_rss_mb() - baseline:.1f} {len(text)}")
+
+def main(args):
+    root = tempfile.mkdtemp(prefix="ftp-bench-")
+    pdf_path = os.path.join(root, "large.pdf")
+    print(f"Generating {args.size_mb} MB PDF...")
+    make_large_pdf(pdf_path, args.size_mb, args.pages)
+    port = start_ftp_server(root)
+
+    env = dict(os.environ, FTP_HOST="127.0.0.1", FTP_PORT=str(port), FTP_USER=FTP_USER,
+               FTP_PASSWORD=FTP_PASSWORD, FTP_POOL_SIZE="0")
+    print(f"PDF size: {os.path.getsize(pdf_path) / 1024 / 1024:.1f} MB")
+    print("-" * 50)
+    for mode in ("bytes", "file"):
+        output = subprocess.run(
+            [sys.executable, __file__, "--child", mode, "--remote-path", "/large.pdf"],
+            env=env, capture_output=True, text=True, check=True
+        ).stdout.split()
+        label = "BytesIO + stream=" if mode == "bytes" else "temp file + path"
+        print(f"{label:>18}: peak RSS growth {output[0]} MB ({output[1]} chars extracted)")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--size-mb", type=int, default=200)
+    parser.add_argument("--pages", type=int, default=20)
+    parser.add_argument("--child", choices=["bytes", "file"])
+    parser.add_argument("--remote-path")
+    args = parser.parse_args()
+    if args.child:
+        child(args.child, args.remote_path)
+    else:
+        main(args)
@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""Text extraction time for 1/10/100/1000-page PDFs: legacy loop vs the page-parallel engine"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import time
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+LINE = "Item {0:05d}  Widget assembly, stainless, 40mm   qty {1:3d}   unit 12.50   total {2:9.2f}"
+
+def make_pdf(path: str, pages: int):
+    import pymupdf
+
+    doc = pymupdf.open()
+    for page_num in range(pages):
+        page = doc.new_page()
+        text = "\n".join(LINE.format(page_num * 60 + i, i, i * 12.5) for i in range(60))
+        page.insert_textbox(page.rect + (36, 36, -36, -36), text, fontsize=7)
+    doc.save(path)
+    doc.close()
+
+def legacy_extract(path: str) -> str:
+    """The original extract_text_node loop, kept for comparison"""
+    import pymupdf
+
+    pdf_document = pymupdf.open(path, filetype="pdf")
+    extracted_text = ""
+    for page_num in range(pdf_document.page_count):
+        page = pdf_document[page_num]
+        extracted_text += page.get_text() + "\n"
+    pdf_document.close()
+    return extracted_text.strip()
+
+def best_of(func, repeats: int) -> float:
+    timings = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - started)
+    return min(timings)
+
+def main(args):
+    logging.disable(logging.WARNING)
+    from app.core.config import settings
+    from app.langgraph import text_extraction
+
+    settings.extraction_workers = args.workers
+    workdir = tempfile.mkdtemp(prefix="extract-bench-")
+
+    # Start the pool once so worker spawn time isn't charged to the first document
+    settings.extraction_parallel_min_pages = 1
+    warmup = os.path.join(workdir, "warmup.pdf")
+    make_pdf(warmup, 2)
+    text_extraction.extract_text(warmup)
+
+    print(f"{'pages':>6} {'legacy':>10} {'sequential':>11} {'parallel':>10} {'default':>10}")
+    print("-" * 52)
+    for pages in args.pages:
+        path = os.path.join(workdir, f"{pages}.pdf")
+        make_pdf(path, pages)
+
+        legacy = best_of(lambda: legacy_extract(path), args.repeats)
+        settings.extraction_parallel_min_pages = 0
+        sequential = best_of(lambda: text_extraction.extract_text(path), args.repeats)
+        settings.extraction_parallel_min_pages = 1
+        parallel = best_of(lambda: text_extraction.extract_text(path), args.repeats)
+        settings.extraction_parallel_min_pages = args.threshold
+        default = best_of(lambda: text_extraction.extract_text(path), args.repeats)
+
+        assert text_extraction.extract_text(path) == legacy_extract(path)
+        print(f"{pages:>6} {legacy * 1000:>8.1f}ms {sequential * 1000:>9.1f}ms "
+              f"{parallel * 1000:>8.1f}ms {default * 1000:>8.1f}ms")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--pages", type=int, nargs="+", default=[1, 10, 100, 1000])
+    parser.add_argument("--workers", type=int, default=0, help="pool size (0 = one per CPU)")
+    parser.add_argument("--threshold", type=int, default=64, help="EXTRACTION_PARALLEL_MIN_PAGES")
+    parser.add_argument("--repeats", type=int, default=3)
+    main(parser.parse_args())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Compare FTPService operations per second with and without the connection pool"""
+
+import argparse
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+FTP_USER = "bench"
+FTP_PASSWORD = "bench"
+
+# Settings requires these even though the benchmark only talks to FTP
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+def start_ftp_server(root: str) -> int:
+    from pyftpdlib.authorizers import DummyAuthorizer
+    from pyftpdlib.handlers import FTPHandler
+    from pyftpdlib.servers import ThreadedFTPServer
+
+    # pyftpdlib only installs its own verbose logging when nothing is configured
+    logging.basicConfig(level=logging.WARNING)
+    authorizer = DummyAuthorizer()
+    authorizer.add_user(FTP_USER, FTP_PASSWORD, root, perm="elradfmwMT")
+    handler = type("BenchHandler", (FTPHandler,), {"authorizer": authorizer})
+    server = ThreadedFTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server.address[1]
+
+def run_ops(service, operations: int, threads: int, remote_path: str) -> float:
+    def op(_):
+        if not service.file_exists(remote_path):
+            raise RuntimeError(f"{remote_path} missing")
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(op, range(operations)))
+    return operations / (time.perf_counter() - started)
+
+def main(args):
+    root = tempfile.mkdtemp(prefix="ftp-bench-")
+    port = start_ftp_server(root)
+
+    os.environ.update({
+        "FTP_HOST": "127.0.0.1",
+        "FTP_PORT": str(port),
+        "FTP_USER": FTP_USER,
+        "FTP_PASSWORD": FTP_PASSWORD,
+    })
+    logging.disable(logging.INFO)
+    from app.core.config import settings
+    from app.services.ftp_service import FTPService
+
+    remote_path = "/bench.pdf"
+    with open(os.path.join(root, "bench.pdf"), "wb") as f:
+        f.write(b"%PDF-1.4\n" + os.urandom(1024))
+
+    print(f"pyftpdlib on 127.0.0.1:{port}, {args.operations} ops, {args.threads} threads")
+    print("-" * 50)
+    for pool_size in (0, args.pool_size):
+        settings.ftp_pool_size = pool_size
+        service = FTPService()
+        ops_per_second = run_ops(service, args.operations, args.threads, remote_path)
+        label = "no pool" if pool_size == 0 else f"pool of {pool_size}"
+        print(f"{label:>12}: {ops_per_second:8.1f} ops/s")
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--operations", type=int, default=500)
+    parser.add_argument("--threads", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=4)
+    main(parser.parse_args())
@@ -0,0 +1,98 @@
+#!/usr/bin/env python3
+"""LLM requests per second in one worker process: new ChatOpenAI per call vs the shared async client
+
+Starts benchmarks/mock_openai_server.py unless --base-url points at a running server.
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import socket
+import subprocess
+import sys
+import time
+from typing import Tuple
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+
+MESSAGES = [("system", "Extract invoice data as JSON."), ("human", "Invoice INV-1 from ACME, total 42.00")]
+
+def start_mock_server(latency: float) -> Tuple[subprocess.Popen, str]:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        port = s.getsockname()[1]
+    server = subprocess.Popen([
+        sys.executable, os.path.join(os.path.dirname(__file__), "mock_openai_server.py"),
+        "--port", str(port), "--latency", str(latency)
+    ])
+    for _ in range(100):
+        try:
+            socket.create_connection(("127.0.0.1", port), timeout=0.1).close()
+            break
+        except OSError:
+            time.sleep(0.1)
+    return server, f"http://127.0.0.1:{port}/v1"
+
+def legacy(requests: int, base_url: str) -> float:
+    """What the worker used to do: asyncio.run per document, a new ChatOpenAI and a blocking invoke"""
+    from langchain_openai import ChatOpenAI
+
+    async def one():
+        llm = ChatOpenAI(model="gpt-4o", api_key="benchmark", base_url=base_url, temperature=0)
+        llm.invoke(MESSAGES)
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        asyncio.run(one())
+    return requests / (time.perf_counter() - started)
+
+def shared(requests: int, concurrency: int) -> float:
+    """Shared client on the persistent loop, with concurrency requests in flight"""
+    from app.core.async_runner import run_async
+    from app.services.llm_client import llm_client
+
+    async def run():
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def one():
+            async with semaphore:
+                await llm_client.get().ainvoke(MESSAGES)
+
+        await asyncio.gather(*(one() for _ in range(requests)))
+
+    started = time.perf_counter()
+    run_async(run())
+    return requests / (time.perf_counter() - started)
+
+def main(args):
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_mock_server(args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    logging.disable(logging.WARNING)
+
+    try:
+        print(f"{args.requests} requests against {base_url} (latency {args.latency}s)")
+        print("-" * 50)
+        print(f"{'new client + invoke':>28}: {legacy(args.requests, base_url):7.1f} req/s")
+        print(f"{'shared client, sequential':>28}: {shared(args.requests, 1):7.1f} req/s")
+        for concurrency in args.concurrency:
+            label = f"shared client, {concurrency} in flight"
+            print(f"{label:>28}: {shared(args.requests, concurrency):7.1f} req/s")
+    finally:
+        if server:
+            server.terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.05)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[8, 32])
+    parser.add_argument("--base-url", help="use an already running OpenAI-compatible server")
+    main(parser.parse_args())
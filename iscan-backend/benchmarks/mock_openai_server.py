@@ -0,0 +1,164 @@
+#!/usr/bin/env python3
+"""Minimal OpenAI-compatible server for benchmarks: canned JSON answers after a fixed latency
+
+Also implements the file and batch endpoints used by offline provider batches.
+
+Point the app at it with OPENAI_BASE_URL=http://127.0.0.1:8089/v1
+"""
+
+import argparse
+import asyncio
+import json
+import re
+import time
+import uuid
+
+import uvicorn
+from fastapi import FastAPI, Form, Request, UploadFile
+from fastapi.responses import JSONResponse, Response
+
+app = FastAPI(title="Mock OpenAI")
+app.state.latency = 0.2
+app.state.rpm = 0
+app.state.requests = 0
+app.state.rate_limited = 0
+app.state.response_formats = {}
+app.state.window = []
+app.state.batch_delay = 0.0
+app.state.files = {}
+app.state.batches = {}
+app.state.batch_requests = 0
+
+def completion(model: str, content: str, prompt_tokens: int) -> dict:
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{
+            "index": 0,
+            "message": {"role": "assistant", "content": content},
+            "finish_reason": "stop",
+        }],
+        "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": 20, "total_tokens": prompt_tokens + 20},
+    }
+
+@app.post("/v1/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+
+    # Optional account limit over a sliding 60s window, answered like OpenAI does
+    if app.state.rpm:
+        now = time.monotonic()
+        app.state.window = [t for t in app.state.window if now - t < 60]
+        if len(app.state.window) >= app.state.rpm:
+            app.state.rate_limited += 1
+            retry_after = 60 - (now - app.state.window[0])
+            return JSONResponse(
+                status_code=429,
+                headers={"retry-after": f"{retry_after:.1f}"},
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            )
+        app.state.window.append(now)
+
+    app.state.requests += 1
+    await asyncio.sleep(app.state.latency)
+    return answer(body)
+
+def answer(body: dict) -> dict:
+    response_format = (body.get("response_format") or {}).get("type", "none")
+    app.state.response_formats[response_format] = app.state.response_formats.get(response_format, 0) + 1
+
+    prompt = "".join(message.get("content") or "" for message in body.get("messages", []))
+    result = {"invoice_number": "INV-1", "vendor_name": "ACME", "total_amount": 42.0}
+    # Packed requests get one result per delimited document
+    documents = len(re.findall(r"=== DOCUMENT \d+ ===", prompt))
+    content = json.dumps({"documents": [result] * documents} if documents else result)
+    return completion(body.get("model", "gpt-4o"), content, len(prompt) // 4)
+
+@app.post("/v1/files")
+async def upload_file(file: UploadFile, purpose: str = Form(...)):
+    content = await file.read()
+    file_id = f"file-{uuid.uuid4().hex}"
+    app.state.files[file_id] = content
+    return {"id": file_id, "object": "file", "bytes": len(content), "created_at": int(time.time()),
+            "filename": file.filename, "purpose": purpose, "status": "processed"}
+
+@app.get("/v1/files/{file_id}/content")
+def file_content(file_id: str):
+    if file_id not in app.state.files:
+        return JSONResponse(status_code=404, content={"error": {"message": "No such file"}})
+    return Response(content=app.state.files[file_id], media_type="application/octet-stream")
+
+def batch_object(batch: dict) -> dict:
+    # Batches complete --batch-delay seconds after creation, answered line by line like chat completions
+    if batch["status"] == "in_progress" and time.time() - batch["created_at"] >= app.state.batch_delay:
+        output = []
+        for line in app.state.files[batch["input_file_id"]].decode().splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            app.state.batch_requests += 1
+            output.append(json.dumps({
+                "id": f"batch_req_{uuid.uuid4().hex}",
+                "custom_id": request["custom_id"],
+                "response": {"status_code": 200, "request_id": uuid.uuid4().hex, "body": answer(request["body"])},
+                "error": None,
+            }))
+        batch["output_file_id"] = f"file-{uuid.uuid4().hex}"
+        app.state.files[batch["output_file_id"]] = "\n".join(output).encode()
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+        batch["request_counts"] = {"total": len(output), "completed": len(output), "failed": 0}
+    return batch
+
+@app.post("/v1/batches")
+async def create_batch(request: Request):
+    body = await request.json()
+    if body.get("input_file_id") not in app.state.files:
+        return JSONResponse(status_code=400, content={"error": {"message": "Unknown input_file_id"}})
+    batch_id = f"batch_{uuid.uuid4().hex}"
+    app.state.batches[batch_id] = {
+        "id": batch_id,
+        "object": "batch",
+        "endpoint": body["endpoint"],
+        "input_file_id": body["input_file_id"],
+        "completion_window": body["completion_window"],
+        "status": "in_progress",
+        "output_file_id": None,
+        "error_file_id": None,
+        "created_at": int(time.time()),
+        "completed_at": None,
+        "request_counts": {"total": 0, "completed": 0, "failed": 0},
+        "metadata": body.get("metadata"),
+    }
+    return app.state.batches[batch_id]
+
+@app.get("/v1/batches/{batch_id}")
+def retrieve_batch(batch_id: str):
+    if batch_id not in app.state.batches:
+        return JSONResponse(status_code=404, content={"error": {"message": "No such batch"}})
+    return batch_object(app.state.batches[batch_id])
+
+@app.get("/stats")
+def stats():
+    return {
+        "requests": app.state.requests,
+        "rate_limited": app.state.rate_limited,
+        "response_formats": app.state.response_formats,
+        "batches": len(app.state.batches),
+        "batch_requests": app.state.batch_requests,
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--latency", type=float, default=0.2, help="seconds per completion")
+    parser.add_argument("--rpm", type=int, default=0, help="answer 429 above this many requests per minute")
+    parser.add_argument("--batch-delay", type=float, default=0.0, help="seconds before a submitted batch completes")
+    args = parser.parse_args()
+    app.state.latency = args.latency
+    app.state.rpm = args.rpm
+    app.state.batch_delay = args.batch_delay
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""Measure /health latency while concurrent large uploads are in flight"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+import httpx
+
+def make_payload(size_mb: int) -> str:
+    """Write a fake PDF of the requested size to a temp file and return its path"""
+    fd, path = tempfile.mkstemp(suffix=".pdf")
+    with os.fdopen(fd, "wb") as f:
+        f.write(b"%PDF-1.4\n")
+        chunk = os.urandom(1024 * 1024)
+        for _ in range(size_mb):
+            f.write(chunk)
+        f.write(b"\n%%EOF\n")
+    return path
+
+def percentile(samples, pct: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, int(round(pct / 100 * (len(ordered) - 1))))
+    return ordered[index]
+
+async def probe_health(client: httpx.AsyncClient, stop: asyncio.Event, interval: float):
+    latencies = []
+    while not stop.is_set():
+        started = time.perf_counter()
+        response = await client.get("/health")
+        response.raise_for_status()
+        latencies.append((time.perf_counter() - started) * 1000)
+        await asyncio.sleep(interval)
+    return latencies
+
+async def upload(client: httpx.AsyncClient, path: str, file_type_id: int):
+    with open(path, "rb") as f:
+        response = await client.post(
+            "/api/v1/files/upload",
+            params={"file_type_id": file_type_id},
+            files={"file": (os.path.basename(path), f, "application/pdf")},
+        )
+    return response.status_code
+
+async def run(args):
+    path = make_payload(args.size_mb)
+    timeout = httpx.Timeout(args.timeout)
+    try:
+        async with httpx.AsyncClient(base_url=args.url, timeout=timeout) as client:
+            print("Baseline /health latency (no uploads)...")
+            stop = asyncio.Event()
+            probe = asyncio.create_task(probe_health(client, stop, args.interval))
+            await asyncio.sleep(args.baseline_seconds)
+            stop.set()
+            baseline = await probe
+
+            print(f"Firing {args.uploads} concurrent {args.size_mb} MB uploads...")
+            stop = asyncio.Event()
+            probe = asyncio.create_task(probe_health(client, stop, args.interval))
+            started = time.perf_counter()
+            statuses = await asyncio.gather(
+                *(upload(client, path, args.file_type_id) for _ in range(args.uploads))
+            )
+            elapsed = time.perf_counter() - started
+            stop.set()
+            loaded = await probe
+    finally:
+        os.remove(path)
+
+    print("-" * 50)
+    print(f"Upload statuses: {statuses}")
+    print(f"Uploads finished in {elapsed:.1f}s")
+    for label, samples in (("idle", baseline), ("under upload", loaded)):
+        print(
+            f"/health {label:>12}: n={len(samples)} "
+            f"p50={statistics.median(samples):.1f}ms "
+            f"p99={percentile(samples, 99):.1f}ms "
+            f"max={max(samples):.1f}ms"
+        )
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--uploads", type=int, default=8)
+    parser.add_argument("--size-mb", type=int, default=50)
+    parser.add_argument("--file-type-id", type=int, default=1)
+    parser.add_argument("--interval", type=float, default=0.01)
+    parser.add_argument("--baseline-seconds", type=float, default=3.0)
+    parser.add_argument("--timeout", type=float, default=600.0)
+    asyncio.run(run(parser.parse_args()))
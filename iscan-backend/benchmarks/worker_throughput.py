@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""Documents per second per GB of RAM: prefork worker processes vs one process with the threads pool
+
+Each document runs the real LangGraph pipeline on pre-extracted text against the mock
+OpenAI server, the way a worker runs process_document. Prefork forks --processes
+children that each handle one document at a time; the threads mode runs --threads
+documents at once in one process, all awaiting the LLM on its shared event loop.
+Memory is the summed proportional set size (PSS) of the worker processes, so pages
+shared copy-on-write with the parent are not counted twice.
+"""
+
+import argparse
+import logging
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+sys.path.append(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("REDIS_URL", "redis://localhost:6379/0")
+os.environ.setdefault("OPENAI_API_KEY", "benchmark")
+os.environ.setdefault("LLM_CACHE_TTL", "0")
+
+from llm_client_throughput import start_mock_server
+
+PROMPTS = {
+    "system_prompt": "Extract invoice data as JSON.",
+    "extraction_prompt": "Return invoice_number, vendor_name and total_amount.",
+    "required_fields": ["invoice_number", "vendor_name", "total_amount"],
+}
+
+def memory_mb() -> float:
+    """PSS of this process (RSS where smaps_rollup is unavailable)"""
+    for path, field in (("/proc/self/smaps_rollup", "Pss:"), ("/proc/self/status", "VmRSS:")):
+        try:
+            with open(path) as f:
+                for line in f:
+                    if line.startswith(field):
+                        return int(line.split()[1]) / 1024
+        except OSError:
+            continue
+    return 0.0
+
+def process_documents(documents: int, threads: int, results):
+    from app.core.async_runner import run_async
+    from app.langgraph.document_processor import process_document
+
+    def one(index: int):
+        text = f"Invoice INV-{index} from ACME Industrial Supplies, total {index}.00 USD"
+        run_async(process_document(None, PROMPTS, page_texts=[text], bypass_llm_cache=True))
+
+    with ThreadPoolExecutor(max_workers=threads) as executor:
+        list(executor.map(one, range(documents)))
+    results.put(memory_mb())
+
+def run(processes: int, threads: int, documents: int) -> tuple:
+    """(documents/s, total worker memory in MB) for processes x threads workers"""
+    context = multiprocessing.get_context("fork")
+    results = context.Queue()
+    per_process = [documents // processes + (i < documents % processes) for i in range(processes)]
+
+    started = time.perf_counter()
+    workers = [context.Process(target=process_documents, args=(count, threads, results)) for count in per_process]
+    for worker in workers:
+        worker.start()
+    memory = sum(results.get() for _ in workers)
+    for worker in workers:
+        worker.join()
+    return documents / (time.perf_counter() - started), memory
+
+def main(args):
+    server = None
+    base_url = args.base_url
+    if not base_url:
+        server, base_url = start_mock_server(args.latency)
+    os.environ["OPENAI_BASE_URL"] = base_url
+    logging.disable(logging.WARNING)
+
+    # Loaded before forking, as the Celery master does, so children share these pages
+    import app.langgraph.document_processor  # noqa: F401
+
+    try:
+        print(f"{args.documents} documents against {base_url} (latency {args.latency}s)")
+        print(f"{'worker mode':<28} {'docs/s':>8} {'memory MB':>10} {'docs/s/GB':>10}")
+        print("-" * 59)
+        modes = [(f"prefork x{args.processes}", args.processes, 1)]
+        modes += [(f"threads x{threads}, 1 process", 1, threads) for threads in args.threads]
+        for label, processes, threads in modes:
+            rate, memory = run(processes, threads, args.documents)
+            print(f"{label:<28} {rate:>8.1f} {memory:>10.0f} {rate / (memory / 1024):>10.1f}")
+    finally:
+        if server:
+            server.terminate()
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.5, help="seconds per mock LLM completion")
+    parser.add_argument("--processes", type=int, default=8, help="prefork worker processes")
+    parser.add_argument("--threads", type=int, nargs="+", default=[8, 32], help="threads pool sizes to compare")
+    parser.add_argument("--base-url", help="use an already running OpenAI-compatible server")
+    main(parser.parse_args())
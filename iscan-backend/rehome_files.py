@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Move stored PDFs into the sharded storage layout and update File.ftp_path.
+
+Safe to interrupt and re-run: files already at their sharded path are skipped,
+and a file already moved in storage whose row was not yet updated is detected and fixed.
+"""
+
+import argparse
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+from sqlalchemy import update
+from sqlalchemy.orm import Session
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models import File
+from app.services.storage_service import storage_service
+
+def rehome(file_id: int, ftp_path: str, target_path: str) -> Tuple[int, Optional[str]]:
+    """Move one file; returns the path to record, or None if it could not be moved"""
+    if storage_service.rename_file(ftp_path, target_path):
+        return file_id, target_path
+
+    # A previous run may have moved it without updating the row
+    if storage_service.file_exists(target_path) and not storage_service.file_exists(ftp_path):
+        return file_id, target_path
+
+    return file_id, None
+
+def rehome_files(chunk_size: int, workers: int, dry_run: bool):
+    db: Session = SessionLocal()
+    last_id = 0
+    moved = skipped = failed = 0
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            while True:
+                chunk = db.query(File.id, File.unique_name, File.ftp_path).filter(
+                    File.id > last_id
+                ).order_by(File.id).limit(chunk_size).all()
+                if not chunk:
+                    break
+                last_id = chunk[-1].id
+
+                pending = []
+                for row in chunk:
+                    target_path = storage_service.pdf_path(row.unique_name)
+                    if row.ftp_path == target_path:
+                        skipped += 1
+                    else:
+                        pending.append((row.id, row.ftp_path, target_path))
+
+                if dry_run:
+                    for file_id, ftp_path, target_path in pending:
+                        print(f"would move file {file_id}: {ftp_path} -> {target_path}")
+                    moved += len(pending)
+                    continue
+
+                results = list(executor.map(lambda item: rehome(*item), pending))
+                updates = [
+                    {"id": file_id, "ftp_path": target_path}
+                    for file_id, target_path in results
+                    if target_path
+                ]
+                failed += len(results) - len(updates)
+
+                if updates:
+                    db.execute(update(File), updates)
+                    db.commit()
+                moved += len(updates)
+
+                print(f"up to file {last_id}: moved={moved} skipped={skipped} failed={failed}")
+    finally:
+        db.close()
+
+    print(f"Done: moved={moved} already sharded={skipped} failed={failed}")
+    return failed == 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--chunk-size", type=int, default=500, help="Files per DB round (one bulk UPDATE each)")
+    parser.add_argument("--workers", type=int, default=max(settings.ftp_pool_size, 1),
+                        help="Parallel moves (FTP moves are bounded by FTP_POOL_SIZE)")
+    parser.add_argument("--dry-run", action="store_true", help="Print planned moves without changing anything")
+    args = parser.parse_args()
+
+    logging.getLogger("app.services.ftp_service").setLevel(logging.WARNING)
+    if not rehome_files(args.chunk_size, args.workers, args.dry_run):
+        raise SystemExit(1)